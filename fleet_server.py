@@ -0,0 +1,52 @@
+"""Fleet server: one host runs Whisper, OpenAI and FineShare for every robot.
+
+Robots connect with robot_client.py. See utils/fleet.py for the protocol
+and scheduling.
+
+    python fleet_server.py --port 7000 --model medium
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from utils.fleet import DEFAULT_PORT, FleetServer
+from utils.reply_cache import ReplyCache
+from utils.transcribe import preload_transcriber
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", default=DEFAULT_PORT, type=int)
+    parser.add_argument("--model", default="medium", choices=["tiny", "base", "small", "medium", "large"], help="Whisper model")
+    parser.add_argument("--stt_workers", default=1, type=int, help="Concurrent transcriptions")
+    parser.add_argument("--stt_batch", default=1, type=int, help="Transcribe up to this many robots' utterances in one batched pass")
+    parser.add_argument("--stt_batch_wait_ms", default=30, type=float, help="Longest an utterance waits for its batch to fill")
+    parser.add_argument("--llm_workers", default=4, type=int, help="Concurrent chat requests")
+    parser.add_argument("--tts_workers", default=4, type=int, help="Concurrent FineShare jobs")
+    args = parser.parse_args()
+
+    if not os.getenv("OPENAI_API_KEY", "").strip():
+        print("OPENAI_API_KEY is not set. Add it to your .env.")
+        sys.exit(1)
+
+    server = FleetServer(OpenAI(), model=args.model, replies=ReplyCache(),
+                         stt_workers=args.stt_workers, llm_workers=args.llm_workers,
+                         tts_workers=args.tts_workers, stt_batch=args.stt_batch,
+                         stt_batch_wait_ms=args.stt_batch_wait_ms)
+    print(f"Loading Whisper {args.model}...")
+    preload_transcriber(model=args.model)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,20 @@ Script to play pitch.mp3 using the speak.py utility.
 This will play the audio while animating servos (if hardware is available).
 """
 
-from pydub import AudioSegment
 from utils.speak import speak_audio
+from utils.envelope import envelope_for_file
+from utils.pcm_cache import load_clip
 
 def main():
     """Load and play the pitch.mp3 file using the speak utility."""
     try:
-        # Load the pitch.mp3 file
-        audio = AudioSegment.from_file("mp3s/pitch.mp3")
+        # Load the pitch.mp3 file (decoded once, memory-mapped after that)
+        audio = load_clip("mp3s/pitch.mp3")
         
         print("Playing pitch.mp3...")
         # Use the speak_audio function to play with servo animation
-        speak_audio(audio, max_angle=60)
+        speak_audio(audio, max_angle=60,
+                    envelope=envelope_for_file("mp3s/pitch.mp3"))
         
         print("Finished playing pitch.mp3")
         
@@ -0,0 +1,155 @@
+"""Thin robot client for fleet mode (see utils/fleet.py and fleet_server.py).
+
+Runs on the Pi. It listens with an energy VAD and streams each utterance
+to the fleet server as it is spoken. Reply chunks are queued on the
+gapless output stream as they arrive, and the mouth follows each one's
+playback from the envelopes the server computed. No Whisper, OpenAI or
+FineShare on the robot.
+
+    python robot_client.py --server 192.168.1.10:7000 --robot obama-2
+    python robot_client.py --text        # type instead of talking
+
+The server address can also come from OBAMA_FLEET_SERVER.
+"""
+
+import argparse
+import os
+import queue
+import socket
+import threading
+from collections import deque
+
+import numpy as np
+from dotenv import load_dotenv
+from pydub import AudioSegment
+
+from utils.audio_out import get_output
+from utils.fleet import CAPTURE_RATE, DEFAULT_PORT, recv_message, send_message
+from utils.speak import animate_servo_with_audio
+from utils.vad import EnergyVAD
+
+BLOCK_SEC = 0.1
+PREROLL_SEC = 0.3  # audio sent from before the detected onset
+
+
+def parse_address(address: str):
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, DEFAULT_PORT
+    return host, int(port)
+
+
+def stream_utterance(sock: socket.socket, energy_threshold: float = 1000,
+                     phrase_timeout: float = 1.2):
+    """Wait for speech, then send it block by block until trailing silence."""
+    import sounddevice as sd
+
+    blocks: queue.Queue = queue.Queue()
+    vad = EnergyVAD(CAPTURE_RATE, energy_threshold, hangover_sec=phrase_timeout)
+    preroll = deque(maxlen=max(1, int(PREROLL_SEC / BLOCK_SEC)))
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+
+    print("Listening...")
+    with sd.InputStream(samplerate=CAPTURE_RATE, channels=1, dtype="float32",
+                        blocksize=int(BLOCK_SEC * CAPTURE_RATE), callback=callback):
+        while not vad.ended:
+            block = blocks.get()
+            vad.process(block)
+            pcm = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            if not vad.triggered:
+                preroll.append(pcm)
+                continue
+            while preroll:
+                send_message(sock, "audio", preroll.popleft())
+            send_message(sock, "audio", pcm)
+    send_message(sock, "end")
+
+
+def play_reply(sock: socket.socket, max_angle: int = 60) -> str:
+    """Speak chunks as they arrive until the server ends the turn; returns the reply.
+
+    Each chunk is queued on the shared output stream right away, so it
+    starts on the sample the previous one ends. A second thread moves the
+    mouth along each clip's playback handle. Returns once everything has
+    been heard.
+    """
+    output = get_output()
+    clips: queue.Queue = queue.Queue()
+
+    def animate():
+        while True:
+            item = clips.get()
+            if item is None:
+                return
+            audio, envelope, playback = item
+            animate_servo_with_audio(audio, max_angle=max_angle, envelope=envelope,
+                                     playback=playback)
+
+    animator = threading.Thread(target=animate, daemon=True)
+    animator.start()
+    try:
+        while True:
+            header, payload = recv_message(sock)
+            kind = header["type"]
+            if kind == "transcript":
+                print("You:", header["text"])
+            elif kind == "chunk":
+                audio = AudioSegment(data=payload, sample_width=2,
+                                     frame_rate=header["sample_rate"], channels=1)
+                envelope = np.asarray(header["envelope"], dtype=np.float32) / 255.0
+                clips.put((audio, envelope, output.play(audio)))
+            elif kind == "error":
+                print("Server error:", header["message"])
+            elif kind == "turn_end":
+                if header["reply"]:
+                    print("Obama:", header["reply"])
+                return header["reply"]
+    except BaseException:
+        output.cancel()  # Ctrl+C or a dropped connection: stop talking now
+        raise
+    finally:
+        clips.put(None)
+        animator.join()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", default=os.getenv("OBAMA_FLEET_SERVER") or f"localhost:{DEFAULT_PORT}")
+    parser.add_argument("--robot", default=socket.gethostname(), help="Name shown in the server log")
+    parser.add_argument("--text", action="store_true", help="Type lines instead of using the microphone")
+    parser.add_argument("--energy_threshold", default=1000, type=float, help="VAD energy threshold (16-bit RMS)")
+    parser.add_argument("--phrase_timeout", default=1.2, type=float, help="Trailing silence that ends the utterance, in seconds")
+    args = parser.parse_args()
+
+    sock = socket.create_connection(parse_address(args.server))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    send_message(sock, "hello", robot=args.robot)
+    header, _ = recv_message(sock)
+    print(f"Connected to {args.server} as {args.robot} ({header.get('session')}). Ctrl+C to quit.")
+    try:
+        while True:
+            if args.text:
+                text = input("Text> ").strip()
+                if text.lower() in {"q", "quit", "exit"}:
+                    break
+                if not text:
+                    continue
+                send_message(sock, "text", text=text)
+            else:
+                stream_utterance(sock, args.energy_threshold, args.phrase_timeout)
+            play_reply(sock)
+    except (KeyboardInterrupt, EOFError):
+        print("\nGoodbye.")
+    finally:
+        try:
+            send_message(sock, "bye")
+        except OSError:
+            pass
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
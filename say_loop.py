@@ -1,13 +1,34 @@
+import asyncio
 import os
-import tempfile
-import time
 from dotenv import load_dotenv
-from pydub import AudioSegment
 
-from utils.generate import generate_tts, fetch_latest_mp3, save_mp3
+from utils.orchestrator import Orchestrator, echo
 from utils.speak import speak_audio
 
 
+def read_line():
+    try:
+        text = input("Text> ").strip()
+    except (EOFError, KeyboardInterrupt):
+        print("\nGoodbye.")
+        return None
+    if text.lower() in {"q", "quit", "exit"}:
+        print("Goodbye.")
+        return None
+    return text
+
+
+def build_orchestrator(listen) -> Orchestrator:
+    """The say loop's pipeline; listen() returns the next line (None stops)."""
+    # The next line can be typed (and starts synthesizing) while the
+    # previous one is still being spoken; lines are spoken in order
+    return Orchestrator(
+        listen, echo, speak=speak_audio, volume_factor=4.0,
+        overlap_listen=True,
+        on_miss=lambda: print("Waiting for audio to be ready..."),
+        before_play=lambda: print("Playing..."))
+
+
 def main():
     print("=== Obama Say Loop ===")
     print("Type a line and press Enter; Obama will say it. Type 'q' to quit.")
@@ -17,32 +38,11 @@ def main():
     if not os.getenv("FINESHARE_API_TOKEN", "").strip():
         print("Warning: FINESHARE_API_TOKEN is not set. Add it to your .env.")
 
-    while True:
-        try:
-            text = input("Text> ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("\nGoodbye.")
-            break
-        if text.lower() in {"q", "quit", "exit"}:
-            print("Goodbye.")
-            break
-        if not text:
-            continue
-
-        try:
-            print("Generating Obama voice...")
-            generate_tts(text)
-            print("Waiting for audio to be ready...")
-            mp3_url = fetch_latest_mp3()
-            with tempfile.TemporaryDirectory() as td:
-                out_path = os.path.join(td, "tts.mp3")
-                save_mp3(mp3_url, out_path, volume_factor=4.0)
-                audio = AudioSegment.from_file(out_path, format="mp3")
-                print("Playing...")
-                speak_audio(audio)
-        except Exception as e:
-            print(f"Error: {e}")
-            time.sleep(1)
+    orchestrator = build_orchestrator(read_line)
+    try:
+        asyncio.run(orchestrator.run())
+    except KeyboardInterrupt:
+        print("\nGoodbye.")
 
 
 if __name__ == "__main__":
@@ -1,20 +1,23 @@
+import asyncio
 import os
 import sys
-import time
-import tempfile
-import threading
-from typing import List, Optional
+from typing import Callable, List, Optional
 import numpy as np
-from pydub import AudioSegment
-from pydub.playback import play
 from openai import OpenAI
 from dotenv import load_dotenv
-import random
 
 # Obama TTS helpers and speaker
-from utils.generate import generate_tts, fetch_latest_mp3, save_mp3
+from utils.chat import chat_obama_style
+from utils.pipeline import SpeechPipeline, stream_sentences
 from utils.speak import speak_audio
-from utils.transcribe import stream_transcribe_until_enter
+from utils.bargein import BargeInDetector
+from utils.generate import get_client
+from utils.history import ConversationHistory
+from utils.orchestrator import Orchestrator, Turn
+from utils.placeholders import PlaceholderPool
+from utils.reply_cache import ReplyCache
+from utils.transcribe import (get_transcriber, preload_transcriber,
+                              stream_transcribe_until_enter)
 
 
 """
@@ -23,84 +26,89 @@ low-latency local Whisper transcription. Previous OpenAI streaming helpers were
 """
 
 
-def chat_obama_style(client: OpenAI, user_text: str, history_messages=None) -> str:
-    """Get a ChatGPT response styled like President Obama."""
-    print("Obama is thinking...")
-    system_prompt = (
-        "You are President Barack Obama. Respond in his tone: thoughtful, measured, dignified, and inspiring. "
-        "Use signature Obama-isms sparingly but recognizably (e.g., 'Let me be clear', 'folks', 'not red states or blue states', 'that's not who we are'). "
-        "Be warm, optimistic, and unifying. Keep responses concise and conversational for audio."
-        "Always keep your responses short and to the point. Only say MAXIMUM ONE SENTENCE. AT MOST 5-12 WORDS. DONT TALK TOO MUCH"
-        "Always be EXTREMELY OPINIONATED about any topic. ALWAYS EXPRESS AND DEFEND YOUR OPINION TO DEATH, even if the opinion may be controversial."
-    )
-    messages = [{"role": "system", "content": system_prompt}]
-    if history_messages:
-        messages.extend(history_messages)
-    messages.append({"role": "user", "content": user_text})
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        temperature=0.8,
-        max_tokens=250,
-    )
-    reply = resp.choices[0].message.content.strip()
-    print("Obama:", reply)
-    return reply
+_placeholder_pool = None
 
 
-def tts_obama_and_play(text: str):
-    """Use FineShare Obama TTS (via fetch.py helpers) to synthesize and play audio."""
-    print("Generating Obama voice...")
-    _ = generate_tts(text)
-
-    # Start placeholder playback immediately in background
-    placeholder_dir = os.path.join(os.getcwd(), "mp3s/placeholder")
-    if os.path.isdir(placeholder_dir):
-        placeholder_files = [
-            f for f in os.listdir(placeholder_dir) if f.endswith('.mp3')]
-        if placeholder_files:
-            selected_file = random.choice(placeholder_files)
-            placeholder_path = os.path.join(placeholder_dir, selected_file)
-            placeholder_audio = AudioSegment.from_file(
-                placeholder_path, format="mp3")
-            placeholder_thread = threading.Timer(
-                0.5, play, args=(placeholder_audio,))
-            placeholder_thread.start()
-            print(
-                f"Playing random placeholder from {placeholder_dir}: {selected_file}")
-        else:
-            print(
-                f"No MP3 files found in {placeholder_dir}; skipping placeholder.")
-    else:
-        print(
-            f"Placeholder directory {placeholder_dir} not found; skipping placeholder.")
-
-    print("Waiting for audio to be ready...")
-    mp3_url = fetch_latest_mp3()
-
-    # Save boosted MP3 to a temp file, then play it
-    with tempfile.TemporaryDirectory() as td:
-        out_mp3 = os.path.join(td, "obama_reply.mp3")
-        save_mp3(mp3_url, filename=out_mp3, volume_factor=4.0)
-        audio = AudioSegment.from_file(out_mp3, format="mp3")
-
-        # If placeholder still playing, wait for it to finish, then add a brief gap before real audio
-        waited_for_placeholder = False
-        if placeholder_thread and placeholder_thread.is_alive():
-            waited_for_placeholder = True
-            placeholder_thread.join()
-            # Add slight separation so it doesn't feel abrupt
-            time.sleep(0.3)
+def _placeholders() -> PlaceholderPool:
+    """Filler clips, decoded once per process."""
+    global _placeholder_pool
+    if _placeholder_pool is None:
+        _placeholder_pool = PlaceholderPool(
+            os.path.join(os.getcwd(), "mp3s/placeholder"))
+    return _placeholder_pool
+
+
+class _Filler:
+    """Placeholder filler for one reply at a time.
+
+    start() runs when the first sentence has to be synthesized; wait()
+    runs right before the real reply speaks.
+    """
 
+    def __init__(self):
+        self.thread = None
+
+    def start(self):
+        # Filler starts right away from the preloaded pool, sized to the
+        # expected TTS wait
+        self.thread = _placeholders().play(
+            get_client().expected_wait(), speak=speak_audio)
+        print("Waiting for audio to be ready...")
+
+    def wait(self):
+        # If placeholder still playing, let it finish; the reply then starts
+        # on the next block of the already-open output stream
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.thread = None
         print("Playing Obama voice...")
-        speak_audio(audio)
+
+
+def start_obama_speech() -> SpeechPipeline:
+    """Open a SpeechPipeline with the placeholder filler wired in.
+
+    Feed it text as it becomes available, then close() and wait(). If the
+    first sentence is already in the TTS cache no placeholder is played.
+    """
+    print("Generating Obama voice...")
+    filler = _Filler()
+    # Sentences are synthesized in parallel (cached ones come straight from
+    # disk) and spoken in order as soon as each is ready
+    return SpeechPipeline(speak=speak_audio, volume_factor=4.0,
+                          on_miss=filler.start, before_play=filler.wait)
+
+
+def tts_obama_and_play(text: str):
+    """Use FineShare Obama TTS (via fetch.py helpers) to synthesize and play audio.
+
+    The reply is split into sentences that are synthesized concurrently and
+    played in order, so speech starts once the first sentence is ready.
+    """
+    speech = start_obama_speech()
+    speech.feed(text)
+    speech.close()
+    speech.wait()
+
+
+def _print_turn_timings(timings: dict, start: float):
+    parts = [f"{k}={timings[k]:.2f}s" for k in
+             ("llm_first_token", "llm_first_sentence", "llm_done") if k in timings]
+    if "first_speech" in timings:
+        parts.append(f"first_speech={timings['first_speech'] - start:.2f}s")
+    if timings.get("reply_cache"):
+        parts.append("reply_cache=hit")
+    if "prompt_tokens" in timings:
+        parts.append(f"prompt_tokens~{timings['prompt_tokens']}")
+    print("Turn timings:", " ".join(parts))
 
 
 def main():
     print("=== Talk to Obama (Continuous) ===")
     print(
         "Setup: Reads your OpenAI API key from .env (OPENAI_API_KEY). If missing, you'll be prompted once and it will be saved.\n"
-        "Each turn: Press Enter to start talking, speak while watching live transcription, then press Enter again to stop and send (or type 'q' to quit).\n"
+        "Each turn: Press Enter to start talking, speak while watching live transcription, then pause or press Enter again to stop and send (or type 'q' to quit).\n"
+        "Set OBAMA_HANDS_FREE=1 to skip the Enter presses entirely.\n"
+        "Set OBAMA_BARGE_IN=1 to be able to interrupt Obama mid-reply.\n"
         "We'll keep conversation context across turns."
     )
 
@@ -130,37 +138,91 @@ def main():
 
     client = OpenAI(api_key=api_key)
 
-    history = []  # list of {role, content} for chat history
-
-    try:
-        while True:
+    # Load + warm up Whisper while the user is reading the prompt
+    preload_transcriber(model="medium", non_english=False)
+    # Decode filler clips now rather than during the first reply
+    _placeholders()
+
+    # Recent turns verbatim, older ones summarized in the background, so
+    # prompt size stays flat over a long session
+    history = ConversationHistory(client)
+    replies = ReplyCache()
+
+    # Hands-free: listen continuously, turns end on trailing silence (VAD)
+    hands_free = os.getenv("OBAMA_HANDS_FREE", "").strip().lower() in {"1", "true", "yes"}
+    if hands_free:
+        print("Hands-free mode: just start talking (Ctrl+C to quit).")
+    # Full duplex: keep listening while Obama talks and stop him when you do
+    barge_in = os.getenv("OBAMA_BARGE_IN", "").strip().lower() in {"1", "true", "yes"}
+    if barge_in:
+        print("Barge-in enabled: start talking at any time to interrupt.")
+
+    filler = _Filler()
+
+    def listen(live=None) -> Optional[str]:
+        # After a barge-in the user is already talking: no prompt, and the
+        # transcription picks up the microphone that heard them interrupt
+        if live is None and not hands_free:
             cmd = input(
                 "\nPress Enter to talk (or type 'q' then Enter to quit): ").strip().lower()
             if cmd == 'q':
                 print("Goodbye.")
-                break
-
-            # Real-time local transcription (press Enter to stop & send)
-            user_text = stream_transcribe_until_enter(
-                model="medium", non_english=False, energy_threshold=1000,
-                record_timeout=0.7, phrase_timeout=1.2,
-            )
-            if not user_text:
-                print("No speech detected. Skipping this turn.")
-                continue
-
-            # Append user message to history
-            history.append({"role": "user", "content": user_text})
-
-            # Obama-style reply conditioned on history
-            reply_text = chat_obama_style(
-                client, user_text, history_messages=history)
-
-            # Append assistant message to history
-            history.append({"role": "assistant", "content": reply_text})
-
-            # TTS to Obama voice and play
-            tts_obama_and_play(reply_text)
+                return None
+
+        # Real-time local transcription (ends on trailing silence or Enter)
+        user_text = stream_transcribe_until_enter(
+            model="medium", non_english=False, energy_threshold=1000,
+            record_timeout=0.7, phrase_timeout=1.2,
+            stop_on_enter=not hands_free, live_input=live,
+        )
+        if not user_text:
+            print("No speech detected. Skipping this turn.")
+        return user_text
+
+    def respond(user_text: str, emit: Callable[[str], None], timings: dict) -> str:
+        # Obama-style reply conditioned on history, streamed sentence by
+        # sentence into TTS so speech starts before the reply is done.
+        # The current message is added by chat_obama_style, not the history.
+        print("Generating Obama voice...")
+        # Frequent booth questions are answered locally (and their audio is
+        # already in the TTS cache)
+        cached = replies.lookup(user_text)
+        if cached is not None:
+            timings["llm_first_token"] = timings["llm_done"] = 0.0
+            timings["reply_cache"] = True
+            print("Obama:", cached)
+            # Same sentences as when it streamed, so TTS hits its cache
+            for sentence in stream_sentences(cached):
+                emit(sentence)
+            return cached
+        timings["prompt_tokens"] = history.prompt_tokens(user_text)
+        reply = chat_obama_style(client, user_text,
+                                 history_messages=history.messages(user_text),
+                                 stream=True, on_sentence=emit, timings=timings)
+        return reply
+
+    def on_reply(turn: Turn):
+        # Record the exchange; if the user cut Obama off, only what they
+        # actually heard
+        reply = turn.reply
+        if turn.interrupted:
+            heard = turn.spoken_text
+            reply = heard + "—" if heard else ""
+        history.add_turn(turn.text, reply)
+        # Only replies that were heard in full are worth replaying to others
+        if not (turn.interrupted or turn.cancelled or turn.error
+                or turn.timings.get("reply_cache")):
+            replies.add(turn.text, turn.reply)
+        _print_turn_timings(turn.timings, turn.started)
+
+    orchestrator = Orchestrator(
+        listen, respond, speak=speak_audio, volume_factor=4.0,
+        # Make sure Whisper is ready for the next turn while this one plays
+        warm=lambda: get_transcriber(model="medium", non_english=False).load(),
+        on_reply=on_reply, on_miss=filler.start, before_play=filler.wait,
+        barge_in=BargeInDetector() if barge_in else None)
+    try:
+        asyncio.run(orchestrator.run())
     except KeyboardInterrupt:
         print("\nInterrupted. Goodbye.")
 
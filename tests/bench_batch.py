@@ -0,0 +1,130 @@
+"""Batched vs sequential Whisper under concurrent streams.
+
+Simulates --streams microphones or robots. Each one transcribes --rounds
+bench_stt.py fixtures back to back, after a random pause of up to
+--gap_ms between utterances. Two modes are run against one loaded model:
+
+    sequential  one transcription at a time, like FleetServer with one STT
+                worker
+    batched     utils.stt_batch.BatchedTranscriber with --max_batch and
+                --max_wait_ms
+
+For each mode it reports throughput (seconds of audio transcribed per
+wall-clock second), per-utterance latency p50/p95 (submit to text,
+queueing included) and the mean batch size of the encoder and decoder
+passes. It also counts transcripts that differ from the sequential ones.
+
+The fixtures are transcribed without a prompt, like the fleet server's
+utterances, so decoding batches as well as encoding. Live streams
+through IncrementalTranscriber prompt each decode with their own text and
+only share encoder passes (see utils/stt_batch.py).
+
+    python tests/bench_batch.py --model tiny --streams 8
+    python tests/bench_batch.py --model small --streams 4 --max_wait_ms 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_stt import FIXTURE_DIR, load_fixtures  # noqa: E402
+
+
+class Sequential:
+    """The unbatched baseline: the backend behind one lock."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, **options):
+        with self._lock:
+            return self.backend.transcribe(audio, **options)
+
+
+def run_streams(engine, fixtures, args) -> tuple:
+    """[(stream, round, fixture, latency_s, text)] and the wall time."""
+    results, lock = [], threading.Lock()
+
+    def stream(index: int):
+        rng = random.Random(index)
+        for turn in range(args.rounds):
+            time.sleep(rng.uniform(0, args.gap_ms / 1000))
+            fixture = (index + turn) % len(fixtures)
+            start = time.perf_counter()
+            text = engine.transcribe(fixtures[fixture][1]).get("text", "").strip()
+            with lock:
+                results.append((index, turn, fixture, time.perf_counter() - start, text))
+
+    threads = [threading.Thread(target=stream, args=(i,)) for i in range(args.streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def main():
+    from utils.stt_backends import BACKENDS, decode_options, get_backend
+    from utils.stt_batch import BatchedTranscriber
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--model", default="tiny", choices=["tiny", "base", "small", "medium", "large"])
+    parser.add_argument("--backend", default="whisper", choices=sorted(BACKENDS))
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3, help="Utterances per stream")
+    parser.add_argument("--gap_ms", type=float, default=200, help="Longest random pause between a stream's utterances")
+    parser.add_argument("--max_batch", type=int, default=8)
+    parser.add_argument("--max_wait_ms", type=float, default=30)
+    parser.add_argument("--no_fallback", action="store_true", help="Single temperature 0 pass")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No WAV fixtures in {args.fixtures}; add <name>.wav + <name>.txt pairs "
+              f"or run tests/make_stt_fixtures.py.")
+        sys.exit(1)
+    options = decode_options(temperature=0.0 if args.no_fallback else (0.0, 0.2, 0.4, 0.6, 0.8, 1.0))
+    backend = get_backend(args.backend, args.model, **options)
+    backend.load()
+
+    engines = {
+        "sequential": Sequential(backend),
+        "batched": BatchedTranscriber(backend, args.max_batch, args.max_wait_ms),
+    }
+    engines["batched"].load()
+    utterances = args.streams * args.rounds
+    print(f"{args.streams} streams x {args.rounds} utterances, {len(fixtures)} fixtures, "
+          f"{args.backend} {backend.model_name}, max_batch={args.max_batch}, "
+          f"max_wait_ms={args.max_wait_ms:g}")
+    print(f"{'mode':<11} {'wall s':>7} {'audio s/s':>10} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'batch':>6} {'decode':>6}")
+    texts = {}
+    for mode, engine in engines.items():
+        results, wall = run_streams(engine, fixtures, args)
+        audio_sec = sum(fixtures[f][1].shape[0] for _, _, f, _, _ in results) / 16000
+        lat = np.array([r[3] for r in results]) * 1000
+        stats = engine.stats() if mode == "batched" else {}
+        batch, decode = stats.get("mean_batch", 1.0), stats.get("mean_decode_batch", 1.0)
+        print(f"{mode:<11} {wall:>7.1f} {audio_sec / wall:>10.2f} "
+              f"{np.percentile(lat, 50):>8.0f} {np.percentile(lat, 95):>8.0f} "
+              f"{batch:>6.1f} {decode:>6.1f}")
+        texts[mode] = {(s, t): text for s, t, _, _, text in results}
+
+    changed = sum(texts["batched"][k] != text for k, text in texts["sequential"].items())
+    print(f"\n{changed}/{utterances} transcripts differ from sequential")
+    print("Unprompted clips. Prompted live streams (IncrementalTranscriber) "
+          "share only the encoder pass.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""End-to-end latency benchmark against local FineShare/OpenAI stand-ins.
+
+Runs the real speaking paths with no network and no sound card. FineShare
+and OpenAI are served by tests/standins.py with a fixed latency profile,
+and audio goes to the null output device (utils/audio_out.py). The null
+device keeps real time, so playback, lip sync and queueing take as long
+as they would on the robot.
+
+    tts    talk_to_obama.tts_obama_and_play() per line, filler included
+    say    say_loop's orchestrator, fed every line as fast as it takes them
+    chat   streamed chat reply -> TTS -> playback, as talk_to_obama (no mic)
+    stt    IncrementalTranscriber on the WAV fixtures of bench_stt.py,
+           fed at real-time pace; reports the wait after the last sample
+
+Each scenario runs in a fresh process, with a cold TTS cache and its own
+trace file. Time to first audio comes from the trace: the first reply
+audio_start after the turn began. Filler clips are reported on their own
+(first_filler_*), so filler doesn't pass for the reply starting. Results
+are compared with tests/bench_baseline.json, and the exit status is 1 if
+any metric regressed by more than --tolerance. It is 2 when there is
+nothing to compare with: no baseline, or one recorded with different
+settings.
+
+    python tests/bench_e2e.py                      # compare with the baseline
+    python tests/bench_e2e.py --update_baseline    # record a new baseline
+    python tests/bench_e2e.py --scenarios tts say --fail_rate 0.05
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from standins import add_profile_args, from_args  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+SCENARIOS = ("tts", "say", "chat", "stt")
+
+LINES = [
+    "Let me be clear.",
+    "Folks, this is not about red states or blue states.",
+    "Yes we can.",
+    "That's not who we are, and it never will be.",
+    "I want to thank everybody for coming out today.",
+    "Now, I know some of you are skeptical, and that's fine.",
+    "Pizza is the best food, and I will defend that to the end.",
+    "We are the ones we've been waiting for.",
+]
+
+QUESTIONS = [
+    "What is your favorite food?",
+    "Do you like robots?",
+    "What do you think about homework?",
+    "Who is the best basketball player?",
+    "Should school start later?",
+    "Is a hot dog a sandwich?",
+]
+
+# Metrics where bigger is better; all others are latencies, rates or counts
+HIGHER_IS_BETTER = ("turns_per_min",)
+# Reported but not checked: they depend on injected failures, not speed
+INFORMATIONAL = ("errors", "turns")
+
+
+def _lines(items, turns: int):
+    """turns distinct texts cycling through items (repeats would hit the cache)."""
+    return [items[i % len(items)] + ("" if i < len(items) else f" Number {i}.")
+            for i in range(turns)]
+
+
+# --- scenarios (run in the child process) ---
+
+def _trace_metrics(path: str, turns: int, wall: float) -> dict:
+    from utils.tracing import get_tracer, load, summarize
+
+    get_tracer().flush()
+    records = load([path])
+    summary = summarize(records)
+    metrics = {"turns": turns, "turns_per_min": turns / wall * 60,
+               "errors": sum(1 for r in records if "error" in r)}
+    for name, stage in (("first_audio", "audio_start:reply"),
+                        ("first_filler", "audio_start:filler")):
+        if stage in summary:
+            metrics[f"{name}_p50_ms"] = summary[stage]["p50"]
+            metrics[f"{name}_p95_ms"] = summary[stage]["p95"]
+    return metrics
+
+
+def run_tts(args) -> dict:
+    import talk_to_obama
+    from utils.tracing import begin_turn, event
+
+    talk_to_obama._placeholders()  # decoded up front, as main() does
+    lines = _lines(LINES, args.turns)
+    start = time.perf_counter()
+    for line in lines:
+        begin_turn()
+        event("bench_start")
+        try:
+            talk_to_obama.tts_obama_and_play(line)
+        except Exception as e:
+            print(f"Turn failed: {e}")
+    return _trace_metrics(os.environ["OBAMA_TRACE"], len(lines),
+                          time.perf_counter() - start)
+
+
+def _run_orchestrator(build, items, turns: int) -> dict:
+    import asyncio
+    from utils.tracing import event
+
+    pending = iter(_lines(items, turns))
+
+    def listen():
+        event("bench_start")
+        return next(pending, None)
+
+    start = time.perf_counter()
+    asyncio.run(build(listen).run())
+    return _trace_metrics(os.environ["OBAMA_TRACE"], turns, time.perf_counter() - start)
+
+
+def run_say(args) -> dict:
+    from say_loop import build_orchestrator
+
+    return _run_orchestrator(build_orchestrator, LINES, args.turns)
+
+
+def run_chat(args) -> dict:
+    from openai import OpenAI
+    from utils.chat import chat_obama_style
+    from utils.orchestrator import Orchestrator
+    from utils.speak import speak_audio
+
+    client = OpenAI()  # base URL and key come from the stand-in env
+
+    def respond(text, emit, timings):
+        return chat_obama_style(client, text, stream=True, on_sentence=emit, timings=timings)
+
+    def build(listen):
+        return Orchestrator(listen, respond, speak=speak_audio, volume_factor=4.0)
+
+    return _run_orchestrator(build, QUESTIONS, args.turns)
+
+
+def run_stt(args) -> dict:
+    from bench_stt import load_fixtures, word_error_rate
+    from utils.transcribe import IncrementalTranscriber, get_transcriber
+
+    fixtures = load_fixtures()
+    if not fixtures:
+        print("No STT fixtures; skipping (see tests/bench_stt.py).")
+        return {}
+    backend = get_transcriber(model=args.model)
+    backend.load()
+    block = 8000  # 0.5 s, as the capture callback delivers it
+    finals, compute, audio_sec, errors, n_ref = [], 0.0, 0.0, 0.0, 0
+    for _, audio, ref in fixtures:
+        inc = IncrementalTranscriber(backend)
+        start = time.perf_counter()
+        for i in range(0, audio.shape[0], block):
+            inc.feed(audio[i:i + block])
+            t0 = time.perf_counter()
+            inc.update()
+            compute += time.perf_counter() - t0
+            # Real-time pace: the next block isn't captured yet
+            delay = start + (i + block) / 16000 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter()
+        text = inc.finish()
+        finals.append((time.perf_counter() - t0) * 1000)
+        compute += finals[-1] / 1000
+        audio_sec += audio.shape[0] / 16000
+        if ref is not None:
+            errors += word_error_rate(ref, text)
+            n_ref += 1
+    metrics = {"final_p50_ms": float(np.percentile(finals, 50)),
+               "final_p95_ms": float(np.percentile(finals, 95)),
+               "rtf": compute / audio_sec}
+    if n_ref:
+        metrics["wer"] = errors / n_ref
+    return metrics
+
+
+RUNNERS = {"tts": run_tts, "say": run_say, "chat": run_chat, "stt": run_stt}
+
+
+# --- driver (parent process) ---
+
+def run_child(scenario: str, args, standins, workdir: str) -> dict:
+    out = os.path.join(workdir, f"{scenario}.json")
+    env = {**os.environ, **standins.env(),
+           "OBAMA_AUDIO_DEVICE": "null",
+           "OBAMA_TTS_CACHE_DIR": os.path.join(workdir, f"{scenario}-tts-cache"),
+           "OBAMA_TRACE": os.path.join(workdir, f"{scenario}.jsonl"),
+           "OBAMA_SERVO_DEBUG": ""}
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", scenario,
+           "--metrics_out", out, "--turns", str(args.turns), "--model", args.model]
+    result = subprocess.run(cmd, cwd=ROOT, env=env,
+                            stdout=None if args.verbose else subprocess.DEVNULL)
+    if result.returncode != 0:
+        raise RuntimeError(f"{scenario} scenario exited with {result.returncode}")
+    with open(out) as f:
+        return json.load(f)
+
+
+def compare(results: dict, baseline: dict, tolerance: float, slack_ms: float):
+    """Print every metric against the baseline; returns the regressed ones."""
+    regressions = []
+    print(f"{'metric':<28} {'value':>10} {'baseline':>10} {'change':>8}")
+    for scenario, metrics in results.items():
+        for name, value in metrics.items():
+            key = f"{scenario}.{name}"
+            base = baseline.get(scenario, {}).get(name)
+            if base is None:
+                print(f"{key:<28} {value:>10.2f} {'-':>10}")
+                continue
+            change = (value - base) / base * 100 if base else 0.0
+            if name in INFORMATIONAL:
+                regressed = False
+            elif name in HIGHER_IS_BETTER:
+                regressed = value < base * (1 - tolerance)
+            else:
+                slack = slack_ms if name.endswith("_ms") else 0.0
+                regressed = value > base * (1 + tolerance) + slack
+            if regressed:
+                regressions.append(key)
+            print(f"{key:<28} {value:>10.2f} {base:>10.2f} {change:>+7.1f}%"
+                  + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--model", default="small", help="Whisper model for the stt scenario")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update_baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown before failing")
+    parser.add_argument("--slack_ms", type=float, default=50,
+                        help="Absolute slack on latency metrics, for timer noise")
+    parser.add_argument("--verbose", action="store_true", help="Show the scenarios' output")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--metrics_out", help=argparse.SUPPRESS)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.child:
+        metrics = RUNNERS[args.child](args)
+        with open(args.metrics_out, "w") as f:
+            json.dump(metrics, f)
+        return
+
+    standins = from_args(args)
+    settings = {**standins.profile, "seed": args.seed, "turns": args.turns,
+                "model": args.model}
+    results = {}
+    with standins, tempfile.TemporaryDirectory(prefix="bench-e2e-") as workdir:
+        for scenario in args.scenarios:
+            print(f"Running {scenario}...")
+            results[scenario] = run_child(scenario, args, standins, workdir)
+        print(f"Stand-in requests: {standins.requests} ({standins.failures} failed)")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+        compare(results, {}, args.tolerance, args.slack_ms)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        compare(results, {}, args.tolerance, args.slack_ms)
+        print(f"\nNO BASELINE at {args.baseline}: nothing was checked for regressions.\n"
+              f"Record one on the target machine with --update_baseline.")
+        sys.exit(2)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print(f"Baseline was recorded with {baseline.get('settings')}, "
+              f"not {settings}; numbers are not comparable.")
+        sys.exit(2)
+    regressions = compare(results, baseline["results"], args.tolerance, args.slack_ms)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
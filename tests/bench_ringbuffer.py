@@ -0,0 +1,81 @@
+"""Capture-buffer benchmark: list + np.concatenate vs AudioRingBuffer.
+
+Simulates a long microphone capture (16 kHz, 0.5 s blocks, a reader tick
+every 100 ms pulling the last `window` seconds) without any audio hardware
+and prints per-tick cost and memory allocated since the buffer was set up,
+once per simulated minute.
+
+    python tests/bench_ringbuffer.py --minutes 10
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.ringbuffer import AudioRingBuffer  # noqa: E402
+
+
+SAMPLE_RATE = 16000
+BLOCK_SEC = 0.5
+TICK_SEC = 0.1
+
+
+def _run(name, write, read, minutes):
+    block = np.random.default_rng(0).standard_normal(
+        int(BLOCK_SEC * SAMPLE_RATE)).astype(np.float32)
+    ticks_per_block = int(BLOCK_SEC / TICK_SEC)
+    ticks_per_minute = int(60 / TICK_SEC)
+    total_ticks = int(minutes * ticks_per_minute)
+
+    print(f"\n{name}")
+    print(f"{'minute':>6} {'tick ms (mean)':>15} {'tick ms (max)':>14} {'traced MB':>10}")
+    tick_times = np.zeros(ticks_per_minute)
+    tracemalloc.start()
+    for tick in range(total_ticks):
+        if tick % ticks_per_block == 0:
+            write(block)
+        t0 = time.perf_counter()
+        window = read()
+        float(window[-1])  # touch the data like a consumer would
+        tick_times[tick % ticks_per_minute] = time.perf_counter() - t0
+        if (tick + 1) % ticks_per_minute == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            minute_ticks = tick_times * 1000
+            print(f"{(tick + 1) // ticks_per_minute:>6} {minute_ticks.mean():>15.3f} "
+                  f"{minute_ticks.max():>14.3f} {current / 1e6:>10.2f}")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"peak traced memory: {peak / 1e6:.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--window", type=float, default=5.0, help="Seconds read per tick")
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="Only run the ring buffer (the list path is slow by design)")
+    args = parser.parse_args()
+    window = int(args.window * SAMPLE_RATE)
+
+    if not args.skip_legacy:
+        blocks = []
+        _run("list.append + np.concatenate (previous capture path)",
+             lambda b: blocks.append(b.copy()),
+             lambda: np.concatenate(blocks)[-window:],
+             args.minutes)
+        del blocks
+
+    ring = AudioRingBuffer(int(3 * args.window * SAMPLE_RATE))
+    _run("AudioRingBuffer (write + zero-copy latest)",
+         ring.write,
+         lambda: ring.latest(window),
+         args.minutes)
+
+
+if __name__ == "__main__":
+    main()
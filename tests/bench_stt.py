@@ -0,0 +1,120 @@
+"""STT backend benchmark: latency and word error rate on recorded WAV fixtures.
+
+Fixtures are `<name>.wav` files (any rate, mono or stereo, 16-bit PCM) with
+the reference transcript in `<name>.txt` next to them. tests/fixtures/stt
+ships a few synthesized lines (see make_stt_fixtures.py); add real
+recordings alongside them. Each backend is
+loaded and warmed up first, so the numbers are per-utterance inference
+only.
+
+    python tests/bench_stt.py --model small --backends whisper whisper-int8
+    python tests/bench_stt.py --beam_size 1 --suppress_timestamps
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "stt")
+
+
+def load_wav(path: str, sample_rate: int = 16000) -> np.ndarray:
+    """Read a 16-bit PCM WAV as mono float32 at sample_rate."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate, channels = w.getframerate(), w.getnchannels()
+        audio = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+    audio = audio.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768.0
+    if rate != sample_rate:
+        n = int(round(audio.shape[0] * sample_rate / rate))
+        audio = np.interp(np.linspace(0, audio.shape[0] - 1, n),
+                          np.arange(audio.shape[0]), audio).astype(np.float32)
+    return audio
+
+
+def load_fixtures(directory: str = FIXTURE_DIR):
+    """[(name, audio, reference_text_or_None)] for every WAV in directory."""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        ref_path = os.path.splitext(path)[0] + ".txt"
+        ref = open(ref_path).read().strip() if os.path.exists(ref_path) else None
+        fixtures.append((os.path.basename(path), load_wav(path), ref))
+    return fixtures
+
+
+def _words(text: str):
+    return re.sub(r"[^a-z0-9' ]", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return float(bool(hyp))
+    # Levenshtein distance over words, one row at a time
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / len(ref)
+
+
+def main():
+    from utils.stt_backends import BACKENDS, decode_options, get_backend
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--model", default="small", choices=["tiny", "base", "small", "medium", "large"])
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--beam_size", type=int, default=None)
+    parser.add_argument("--no_fallback", action="store_true", help="Single temperature 0 pass")
+    parser.add_argument("--suppress_timestamps", action="store_true")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No WAV fixtures in {args.fixtures}; add <name>.wav + <name>.txt pairs "
+              f"or run tests/make_stt_fixtures.py.")
+        sys.exit(1)
+    options = decode_options(
+        beam_size=args.beam_size,
+        temperature=0.0 if args.no_fallback else (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        suppress_timestamps=args.suppress_timestamps,
+    )
+    audio_sec = sum(a.shape[0] for _, a, _ in fixtures) / 16000
+
+    print(f"{len(fixtures)} fixtures, {audio_sec:.1f}s of audio, model={args.model}, options={options}")
+    print(f"{'backend':<14} {'load s':>7} {'mean ms':>8} {'p95 ms':>8} {'RTF':>6} {'WER':>6}")
+    for name in args.backends:
+        backend = get_backend(name, args.model, **options)
+        t0 = time.perf_counter()
+        backend.load()
+        load_s = time.perf_counter() - t0
+
+        latencies, errors, n_ref = [], 0.0, 0
+        for _ in range(args.repeat):
+            for fixture, audio, ref in fixtures:
+                t0 = time.perf_counter()
+                text = backend.transcribe(audio).get("text", "")
+                latencies.append(time.perf_counter() - t0)
+                if ref is not None:
+                    errors += word_error_rate(ref, text)
+                    n_ref += 1
+        lat = np.array(latencies) * 1000
+        rtf = lat.sum() / 1000 / (audio_sec * args.repeat)
+        wer = f"{errors / n_ref:.3f}" if n_ref else "n/a"
+        print(f"{name:<14} {load_s:>7.1f} {lat.mean():>8.0f} {np.percentile(lat, 95):>8.0f} {rtf:>6.2f} {wer:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Fleet load test: N simulated robots against one fleet server.
+
+By default the server runs in-process. OpenAI and FineShare are replaced by
+the tests/standins.py latency profile, and the server uses a real Whisper
+model. Each robot connects, then loops for --turns turns:
+
+1. Send an utterance. In audio mode this streams a bench_stt.py WAV
+   fixture in 0.1 s blocks at real-time pace. In text mode it sends a
+   typed question.
+2. Receive the reply chunks and "play" them, which takes their real
+   duration.
+3. Pause for --think_ms.
+
+Robots start staggered over --ramp seconds.
+
+Reports first-chunk latency (end of utterance to first reply audio) and
+turn latency per robot and overall, turns per minute, Jain's fairness
+index over the robots' mean first-chunk latency (1.0 = perfectly even),
+and how deep each shared stage queue got.
+
+    python tests/load_fleet.py --robots 8 --turns 3
+    python tests/load_fleet.py --robots 20 --input text --tts_ms 800
+    python tests/load_fleet.py --server 192.168.1.10:7000   # an external server
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standins import add_profile_args, from_args  # noqa: E402
+
+QUESTIONS = [
+    "What is your favorite food?",
+    "Do you like robots?",
+    "What do you think about homework?",
+    "Who is the best basketball player?",
+    "Should school start later?",
+    "Is a hot dog a sandwich?",
+]
+
+BLOCK_SEC = 0.1
+
+
+async def robot(name: str, host: str, port: int, args, fixtures, delay: float, results: list):
+    from utils.fleet import CAPTURE_RATE, read_message, write_message
+
+    await asyncio.sleep(delay)
+    reader, writer = await asyncio.open_connection(host, port)
+    await write_message(writer, "hello", robot=name)
+    await read_message(reader)
+    rng = random.Random(name)
+    playing_until = 0.0
+    for turn in range(args.turns):
+        if fixtures:
+            audio = fixtures[rng.randrange(len(fixtures))]
+            pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+            block = int(BLOCK_SEC * CAPTURE_RATE)
+            start = time.monotonic()
+            for i in range(0, pcm.shape[0], block):
+                await write_message(writer, "audio", pcm[i:i + block].tobytes())
+                await asyncio.sleep(max(0.0, start + (i + block) / CAPTURE_RATE - time.monotonic()))
+            await write_message(writer, "end")
+        else:
+            await write_message(writer, "text", text=rng.choice(QUESTIONS))
+        sent = time.monotonic()
+        first_chunk, errors = None, 0
+        while True:
+            header, payload = await read_message(reader)
+            now = time.monotonic()
+            if header["type"] == "chunk":
+                if first_chunk is None:
+                    first_chunk = now - sent
+                duration = len(payload) / 2 / header["sample_rate"]
+                playing_until = max(playing_until, now) + duration
+            elif header["type"] == "error":
+                errors += 1
+            elif header["type"] == "turn_end":
+                break
+        results.append({"robot": name, "turn": turn, "first_chunk": first_chunk,
+                        "turn_sec": time.monotonic() - sent, "errors": errors})
+        # Listening starts again once the reply has been heard
+        await asyncio.sleep(max(0.0, playing_until - time.monotonic()) + args.think_ms / 1000)
+    await write_message(writer, "bye")
+    writer.close()
+
+
+def jain_index(values) -> float:
+    values = np.asarray(values, dtype=np.float64)
+    return float(values.sum() ** 2 / (len(values) * (values * values).sum())) if len(values) else 1.0
+
+
+def ms(seconds) -> np.ndarray:
+    return np.asarray(seconds, dtype=np.float64) * 1000
+
+
+def report(results: list, wall: float, server=None):
+    robots = sorted({r["robot"] for r in results})
+    print(f"\n{'robot':<10} {'turns':>5} {'first p50':>10} {'first max':>10} {'turn p50':>9} {'errors':>6}")
+    means = []
+    for name in robots:
+        mine = [r for r in results if r["robot"] == name]
+        firsts = ms([r["first_chunk"] for r in mine if r["first_chunk"] is not None])
+        turns = ms([r["turn_sec"] for r in mine])
+        if firsts.size:
+            means.append(firsts.mean())
+        print(f"{name:<10} {len(mine):>5} "
+              f"{np.percentile(firsts, 50) if firsts.size else float('nan'):>10.0f} "
+              f"{firsts.max() if firsts.size else float('nan'):>10.0f} "
+              f"{np.percentile(turns, 50):>9.0f} {sum(r['errors'] for r in mine):>6}")
+
+    firsts = ms([r["first_chunk"] for r in results if r["first_chunk"] is not None])
+    print(f"\n{len(results)} turns from {len(robots)} robots in {wall:.1f}s "
+          f"({len(results) / wall * 60:.1f} turns/min)")
+    if firsts.size:
+        print(f"first chunk ms: p50 {np.percentile(firsts, 50):.0f}, "
+              f"p95 {np.percentile(firsts, 95):.0f}, p99 {np.percentile(firsts, 99):.0f}")
+    print(f"fairness (Jain, mean first chunk per robot): {jain_index(means):.3f}")
+    if server is not None:
+        stats = server.stats()
+        print(f"deepest queues: {stats['max_queued']}")
+        if "stt_batch" in stats:
+            print(f"stt batching: {stats['stt_batch']}")
+
+
+async def run(args, fixtures):
+    server = None
+    if args.server:
+        host, _, port = args.server.rpartition(":")
+        port = int(port)
+    else:
+        from openai import OpenAI
+        from utils.fleet import FleetServer
+
+        server = FleetServer(OpenAI(), model=args.model, stt_workers=args.stt_workers,
+                             llm_workers=args.llm_workers, tts_workers=args.tts_workers,
+                             stt_batch=args.stt_batch, stt_batch_wait_ms=args.stt_batch_wait_ms)
+        if fixtures:
+            # Model load is not part of the load
+            from utils.transcribe import get_transcriber
+            await asyncio.to_thread(get_transcriber(args.model).load)
+        listener = await server.start("127.0.0.1", 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+    results = []
+    start = time.monotonic()
+    await asyncio.gather(*(
+        robot(f"robot-{i + 1}", host, port, args, fixtures,
+              args.ramp * i / max(1, args.robots - 1), results)
+        for i in range(args.robots)))
+    report(results, time.monotonic() - start, server)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--robots", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--input", choices=["audio", "text"], default="audio",
+                        help="Stream WAV fixtures (falls back to text without them)")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds over which robots connect")
+    parser.add_argument("--think_ms", type=float, default=500, help="Pause between hearing a reply and talking again")
+    parser.add_argument("--server", help="HOST:PORT of a running fleet server instead of an in-process one")
+    parser.add_argument("--model", default="tiny", choices=["tiny", "base", "small", "medium", "large"])
+    parser.add_argument("--stt_workers", type=int, default=1)
+    parser.add_argument("--stt_batch", type=int, default=1, help="Batched STT (see utils/stt_batch.py)")
+    parser.add_argument("--stt_batch_wait_ms", type=float, default=30)
+    parser.add_argument("--llm_workers", type=int, default=4)
+    parser.add_argument("--tts_workers", type=int, default=4)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    fixtures = []
+    if args.input == "audio":
+        from bench_stt import load_fixtures
+        fixtures = [audio for _, audio, _ in load_fixtures()]
+        if not fixtures:
+            print("No STT fixtures (see tests/bench_stt.py); robots will send text.")
+
+    if args.server:
+        asyncio.run(run(args, fixtures))
+        return
+    # The in-process server talks to the stand-ins, with a cold TTS cache
+    with from_args(args) as standins, tempfile.TemporaryDirectory(prefix="load-fleet-") as workdir:
+        os.environ.update(standins.env())
+        os.environ["OBAMA_TTS_CACHE_DIR"] = os.path.join(workdir, "tts-cache")
+        os.environ.setdefault("OBAMA_TRACE", os.path.join(workdir, "trace.jsonl"))
+        asyncio.run(run(args, fixtures))
+        print(f"Stand-in requests: {standins.requests} ({standins.failures} failed)")
+
+
+if __name__ == "__main__":
+    main()
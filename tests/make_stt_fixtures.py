@@ -0,0 +1,111 @@
+"""Synthesize the STT fixtures in tests/fixtures/stt with espeak-ng.
+
+Writes <name>.wav (16 kHz mono 16-bit PCM) and the reference <name>.txt
+for each line below. bench_stt.py, bench_batch.py, bench_e2e.py (stt) and
+load_fleet.py read these pairs. espeak-ng comes from the espeakng-loader
+wheel (pip install espeakng-loader), so nothing needs to be installed
+system-wide and the clips come out the same on every machine.
+
+A synthetic voice is easier on Whisper than a visitor at the booth, so the
+WER numbers are a floor, not what the robot will see. Drop real recordings
+(<name>.wav + <name>.txt) next to these for that.
+
+    python tests/make_stt_fixtures.py
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_stt import FIXTURE_DIR  # noqa: E402
+
+LINES = {
+    "arc_of_history": "The arc of history is long, but it bends toward justice.",
+    "destiny": "Our destiny is not written for us, but by us.",
+    "one_nation": "We rise or fall as one nation, as one people.",
+    "change": "Change doesn't come from Washington. Change comes to Washington.",
+    "walking": "If you're walking down the right path and you're willing to keep "
+               "walking, eventually you'll make progress.",
+    "favorite_food": "What is your favorite food?",
+}
+
+SAMPLE_RATE = 16000
+_SYNCHRONOUS = 2  # espeak_AUDIO_OUTPUT: AUDIO_OUTPUT_SYNCHRONOUS
+_RATE = 1         # espeak_PARAMETER: espeakRATE
+_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short),
+                             ctypes.c_int, ctypes.c_void_p)
+
+
+class ESpeak:
+    """Just enough of the espeak-ng C API to render text to samples."""
+
+    def __init__(self, voice: str = "en-us", words_per_minute: int = 160):
+        import espeakng_loader
+
+        self.lib = ctypes.cdll.LoadLibrary(espeakng_loader.get_library_path())
+        self.rate = self.lib.espeak_Initialize(
+            _SYNCHRONOUS, 0, espeakng_loader.get_data_path().encode(), 0)
+        if self.rate <= 0:
+            raise RuntimeError("espeak-ng failed to initialize")
+        self._samples = []
+        # Kept on self: ctypes callbacks must outlive the C side's pointer
+        self._callback = _CALLBACK(self._collect)
+        self.lib.espeak_SetSynthCallback(self._callback)
+        self.lib.espeak_SetVoiceByName(voice.encode())
+        self.lib.espeak_SetParameter(_RATE, words_per_minute, 0)
+
+    def _collect(self, wav, count, events) -> int:
+        if count > 0:
+            self._samples.append(np.ctypeslib.as_array(wav, shape=(count,)).copy())
+        return 0
+
+    def synthesize(self, text: str) -> np.ndarray:
+        """int16 samples at self.rate."""
+        self._samples = []
+        data = text.encode("utf-8") + b"\0"
+        self.lib.espeak_Synth(data, len(data), 0, 0, 0, 0, None, None)
+        self.lib.espeak_Synchronize()
+        return np.concatenate(self._samples) if self._samples else np.zeros(0, np.int16)
+
+
+def resample(samples: np.ndarray, rate: int, target: int = SAMPLE_RATE) -> np.ndarray:
+    n = int(round(samples.shape[0] * target / rate))
+    out = np.interp(np.linspace(0, samples.shape[0] - 1, n),
+                    np.arange(samples.shape[0]), samples.astype(np.float32))
+    return np.clip(np.round(out), -32768, 32767).astype(np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=FIXTURE_DIR)
+    parser.add_argument("--voice", default="en-us")
+    parser.add_argument("--wpm", type=int, default=160, help="Speaking rate")
+    args = parser.parse_args()
+
+    try:
+        engine = ESpeak(args.voice, args.wpm)
+    except ImportError:
+        print("espeakng-loader is not installed: pip install espeakng-loader")
+        sys.exit(1)
+    os.makedirs(args.out, exist_ok=True)
+    pad = np.zeros(int(0.3 * SAMPLE_RATE), dtype=np.int16)  # a little room either side
+    for name, text in LINES.items():
+        audio = np.concatenate([pad, resample(engine.synthesize(text), engine.rate), pad])
+        with wave.open(os.path.join(args.out, name + ".wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(SAMPLE_RATE)
+            w.writeframes(audio.tobytes())
+        with open(os.path.join(args.out, name + ".txt"), "w") as f:
+            f.write(text + "\n")
+        print(f"{name}: {audio.shape[0] / SAMPLE_RATE:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
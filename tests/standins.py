@@ -0,0 +1,271 @@
+"""Local HTTP stand-ins for the FineShare TTS API and the OpenAI chat endpoint.
+
+One threaded server answers everything the robot talks to over the
+network:
+
+    POST /api/fsmstexttospeech   submit a job; it is "rendered" tts_ms later
+    GET  /api/listmyvoicefiles   rendered jobs, newest first
+    GET  /files/<id>.mp3         the job's MP3 (a fixed fixture clip)
+    POST /v1/chat/completions    a canned Obama reply, streamed or not
+
+Every request waits latency_ms plus up to jitter_ms, and fails with a 503
+with probability fail_rate. The random draws come from one seeded
+generator, so a given profile produces the same latency distribution on
+every run. env() holds the variables that point utils.generate and the
+OpenAI client at the server.
+
+    python tests/standins.py --port 8765 --latency_ms 80   # run standalone
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_MP3 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "testaudio.mp3")
+
+# Numbered, so no two replies share TTS audio (as with a real, sampled LLM)
+REPLY_TEMPLATE = ("Let me be clear, folks: {topic} is not a red state or blue state "
+                  "question. That's not who we are, and I'll say it {n} times.")
+
+
+class StandIns:
+    """FineShare + OpenAI stand-in server with a configurable latency profile."""
+
+    def __init__(self, latency_ms: float = 60, jitter_ms: float = 20,
+                 fail_rate: float = 0.0, tts_ms: float = 1200,
+                 llm_first_token_ms: float = 400, llm_token_ms: float = 25,
+                 mp3_path: str = DEFAULT_MP3, seed: int = 0, port: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.tts_ms = tts_ms
+        self.llm_first_token_ms = llm_first_token_ms
+        self.llm_token_ms = llm_token_ms
+        with open(mp3_path, "rb") as f:
+            self.mp3 = f.read()
+        self.requests = {}
+        self.failures = 0
+        self._replies = 0
+        self._rng = random.Random(seed)
+        self._jobs = {}  # id -> time the job's file shows up in the listing
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self._server.standins = self
+        self._thread = None
+
+    @property
+    def profile(self) -> dict:
+        """The settings that shape latency, for comparing benchmark runs."""
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms,
+                "fail_rate": self.fail_rate, "tts_ms": self.tts_ms,
+                "llm_first_token_ms": self.llm_first_token_ms,
+                "llm_token_ms": self.llm_token_ms}
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        return {
+            "OBAMA_TTS_GENERATE_URL": self.url + "/api/fsmstexttospeech",
+            "OBAMA_TTS_LIST_URL": self.url + "/api/listmyvoicefiles",
+            "FINESHARE_API_TOKEN": "standin",
+            "OPENAI_BASE_URL": self.url + "/v1",
+            "OPENAI_API_KEY": "sk-standin",
+        }
+
+    def start(self) -> "StandIns":
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True, name="standins")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # --- request handling (server threads) ---
+
+    def _draw(self, spread_ms: float) -> float:
+        with self._lock:
+            return self._rng.random() * spread_ms / 1000
+
+    def _admit(self, endpoint: str) -> bool:
+        """Sleep the network latency; False if this request should fail."""
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            delay = (self.latency_ms + self._rng.random() * self.jitter_ms) / 1000
+            failed = self._rng.random() < self.fail_rate
+            if failed:
+                self.failures += 1
+        time.sleep(delay)
+        return not failed
+
+    def submit(self, text: str) -> dict:
+        job_id = uuid.uuid4().hex
+        ready = time.monotonic() + self.tts_ms / 1000 + self._draw(self.jitter_ms)
+        with self._lock:
+            self._jobs[job_id] = ready
+        return {"id": job_id, "available_count": 100, "text": text}
+
+    def listing(self, limit: int) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            ready = sorted(((t, j) for j, t in self._jobs.items() if t <= now), reverse=True)
+        return {"files": [{"id": job_id, "cover": {"url": f"{self.url}/files/{job_id}.mp3"}}
+                          for _, job_id in ready[:limit]]}
+
+    def reply(self, messages: list) -> str:
+        question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        topic = " ".join(question.rstrip("?.!").split()[-4:]) or "this"
+        with self._lock:
+            self._replies += 1
+            n = self._replies
+        return REPLY_TEMPLATE.format(topic=topic, n=n)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as the real APIs
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def standins(self) -> StandIns:
+        return self.server.standins
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data: dict, status: int = 200):
+        self._send(status, json.dumps(data).encode())
+
+    def _unavailable(self):
+        self._json({"error": {"message": "stand-in injected failure"}}, status=503)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/listmyvoicefiles"):
+            if not self.standins._admit("list"):
+                return self._unavailable()
+            limit = int(parse_qs(url.query).get("limit", ["1"])[0])
+            self._json(self.standins.listing(limit))
+        elif url.path.startswith("/files/"):
+            if not self.standins._admit("download"):
+                return self._unavailable()
+            self._send(200, self.standins.mp3, "audio/mpeg")
+        else:
+            self._json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._body()
+        if url.path.endswith("/fsmstexttospeech"):
+            if not self.standins._admit("generate"):
+                return self._unavailable()
+            self._json(self.standins.submit(body.get("speech", "")))
+        elif url.path.endswith("/chat/completions"):
+            if not self.standins._admit("chat"):
+                return self._unavailable()
+            self._chat(body)
+        else:
+            self._json({"error": "not found"}, status=404)
+
+    def _chat(self, body: dict):
+        s = self.standins
+        reply = s.reply(body.get("messages", []))
+        tokens = [w + " " for w in reply.split(" ")]
+        base = {"id": "chatcmpl-standin", "created": int(time.time()),
+                "model": body.get("model", "gpt-4o-mini")}
+        time.sleep(s.llm_first_token_ms / 1000)
+        if not body.get("stream"):
+            time.sleep(len(tokens) * s.llm_token_ms / 1000)
+            return self._json({**base, "object": "chat.completion", "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": reply}}]})
+
+        # Server-sent events; the connection closes at the end of the stream
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(s.llm_token_ms / 1000)
+            self._event({**base, "object": "chat.completion.chunk", "choices": [{
+                "index": 0, "finish_reason": None, "delta": {"content": token}}]})
+        self._event({**base, "object": "chat.completion.chunk", "choices": [{
+            "index": 0, "finish_reason": "stop", "delta": {}}]})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _event(self, data: dict):
+        self.wfile.write(b"data: " + json.dumps(data).encode() + b"\n\n")
+        self.wfile.flush()
+
+
+def add_profile_args(parser):
+    """Stand-in latency profile options shared by the benchmarks."""
+    parser.add_argument("--latency_ms", type=float, default=60, help="Per-request network latency")
+    parser.add_argument("--jitter_ms", type=float, default=20, help="Up to this much extra latency")
+    parser.add_argument("--fail_rate", type=float, default=0.0, help="Share of requests that get a 503")
+    parser.add_argument("--tts_ms", type=float, default=1200, help="FineShare render time per job")
+    parser.add_argument("--llm_first_token_ms", type=float, default=400)
+    parser.add_argument("--llm_token_ms", type=float, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def from_args(args, port: int = 0) -> StandIns:
+    return StandIns(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                    fail_rate=args.fail_rate, tts_ms=args.tts_ms,
+                    llm_first_token_ms=args.llm_first_token_ms,
+                    llm_token_ms=args.llm_token_ms, seed=args.seed, port=port)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    with from_args(args, port=args.port) as standins:
+        print("Stand-ins listening; point the robot at them with:")
+        for key, value in standins.env().items():
+            print(f"  export {key}={value}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,64 @@
+"""IncrementalTranscriber commit logic, against stub backends (no model needed).
+
+    python -m pytest tests/test_transcribe.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.transcribe import IncrementalTranscriber  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+class NeverSettles:
+    """Every decode disagrees with the last and carries no timings."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        text = f" take{self.calls} {audio.size}"
+        return {"text": text, "segments": [{"start": 0.0, "end": audio.size / SAMPLE_RATE,
+                                            "text": text}]}
+
+
+class Segments:
+    """Two segments per second of audio, no word timings."""
+
+    def transcribe(self, audio, **options):
+        assert options["word_timestamps"] is False
+        segments = [{"start": i / 2, "end": (i + 1) / 2, "text": f" part{i} done"}
+                    for i in range(int(audio.size / SAMPLE_RATE * 2))]
+        return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+
+def _feed(engine, seconds, block_sec=0.5):
+    block = np.zeros(int(block_sec * SAMPLE_RATE), dtype=np.float32)
+    for _ in range(int(seconds / block_sec)):
+        engine.feed(block)
+        # The uncommitted tail must never fall out of the ring
+        assert engine._start >= engine.ring.oldest
+        engine.update()
+
+
+def test_commits_before_the_ring_wraps_without_commit_points():
+    engine = IncrementalTranscriber(NeverSettles(), max_tail_sec=2.0)
+    _feed(engine, 60)
+    assert engine.committed
+    tail = engine.ring.written - engine._start
+    assert tail <= 2 * engine.max_tail + SAMPLE_RATE
+
+
+def test_segment_commits_without_word_timestamps():
+    engine = IncrementalTranscriber(Segments(), word_timestamps=False)
+    _feed(engine, 2)
+    # Only finished segments commit; the last one may still be mid-phrase
+    assert engine.committed[:2] == ["part0", "done"]
+    assert engine._start % (SAMPLE_RATE // 2) == 0
+    assert engine.tentative[-1] == "done"
@@ -0,0 +1,328 @@
+"""Persistent, low-latency audio output with a gapless playback queue.
+
+One sounddevice OutputStream stays open for the life of the process; clips
+are scheduled onto a single frame timeline and mixed in the stream
+callback. Back-to-back clips start on the exact frame the previous one
+ended (plus an optional gap, or minus a crossfade), and whatever is playing
+can be cancelled at any time.
+
+The stream also reports where playback actually is: each callback records
+the DAC time of its first frame, so position() is the frame currently
+coming out of the speaker rather than the frame last handed to PortAudio.
+
+    out = get_output()
+    clip = out.play(audio_segment)
+    clip.position()   # seconds into the clip that have been heard
+    clip.wait()
+
+device="null" (or OBAMA_AUDIO_DEVICE=null for the shared output) renders
+on a timer and discards the samples. Clocks, queueing and cancellation
+behave exactly as with a sound card, which is what headless benchmarks
+need.
+"""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+import numpy as np
+from pydub import AudioSegment
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):  # no PortAudio: only the null device works
+    sd = None
+
+_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def to_float(audio: AudioSegment, sample_rate: int, channels: int) -> np.ndarray:
+    """Samples of audio as float32 in [-1, 1], shape (frames, channels)."""
+    if audio.frame_rate != sample_rate:
+        audio = audio.set_frame_rate(sample_rate)
+    if audio.channels != channels:
+        audio = audio.set_channels(channels)
+    dtype = _DTYPES[audio.sample_width]
+    samples = np.frombuffer(audio.raw_data, dtype=dtype).astype(np.float32)
+    samples /= float(np.iinfo(dtype).max) + 1
+    return samples.reshape(-1, channels)
+
+
+class Playback:
+    """Handle for one scheduled clip."""
+
+    def __init__(self, output: "AudioOutput", samples: np.ndarray, start: int,
+                 fade_in: int = 0):
+        self.output = output
+        self.samples = samples
+        self.start = start
+        self.end = start + samples.shape[0]
+        self.fade_in = fade_in
+        self.fade_out = 0
+        self.cancelled = False
+        self._rendered = threading.Event()
+
+    @property
+    def duration(self) -> float:
+        return self.samples.shape[0] / self.output.sample_rate
+
+    def position(self) -> float:
+        """Seconds of this clip heard so far (negative before it starts)."""
+        return (self.output.position() - self.start) / self.output.sample_rate
+
+    @property
+    def done(self) -> bool:
+        return self.cancelled or self.output.position() >= self.end
+
+    def cancel(self):
+        self.output.cancel(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the last frame has been heard (or the clip was cancelled)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._rendered.wait(timeout):
+            return False
+        while not self.done:
+            remaining = (self.end - self.output.position()) / self.output.sample_rate
+            if deadline is not None:
+                remaining = min(remaining, deadline - time.monotonic())
+                if remaining <= 0:
+                    return False
+            time.sleep(min(max(remaining, 0.001), 0.05))
+        return True
+
+
+class AudioOutput:
+    """Single long-lived output stream mixing a timeline of queued clips.
+
+    gap / crossfade (seconds) are the defaults for clips queued while
+    something is still playing: a positive gap inserts silence between
+    them, a crossfade overlaps the previous clip's tail with linear fades.
+    A clip queued while the output is idle starts on the next block.
+    """
+
+    def __init__(self, sample_rate: int = 44100, channels: int = 1,
+                 blocksize: int = 256, latency="low", device=None,
+                 gap: float = 0.0, crossfade: float = 0.0):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.latency = latency
+        self.device = device
+        self.gap = gap
+        self.crossfade = crossfade
+        self.underflows = 0
+        self._clips: List[Playback] = []
+        self._lock = threading.Lock()
+        self._stream = None
+        self._next_frame = 0  # first frame of the next block to render
+        self._cursor = 0      # end of the last scheduled clip
+        # (stream frame, monotonic time it reaches the DAC) of the last block
+        self._anchor = None
+        # RMS of the last ~0.5 s of rendered blocks (for echo-aware barge-in)
+        self._levels = np.zeros(max(1, int(0.5 * sample_rate / blocksize)), dtype=np.float32)
+        self._level_idx = 0
+
+    # --- stream lifetime ---
+
+    def start(self):
+        with self._lock:
+            if self._stream is None:
+                if self.device == "null":
+                    stream_cls = NullStream
+                elif sd is None:
+                    raise RuntimeError("sounddevice is not available; "
+                                       "use device='null' for a silent output")
+                else:
+                    stream_cls = sd.OutputStream
+                self._stream = stream_cls(
+                    samplerate=self.sample_rate, channels=self.channels,
+                    dtype="float32", blocksize=self.blocksize,
+                    latency=self.latency, device=self.device,
+                    callback=self._callback)
+                self._stream.start()
+        return self
+
+    def close(self):
+        with self._lock:
+            stream, self._stream = self._stream, None
+            clips, self._clips = self._clips, []
+        if stream is not None:
+            stream.stop()
+            stream.close()
+        for clip in clips:
+            clip.cancelled = True
+            clip._rendered.set()
+
+    @property
+    def output_latency(self) -> float:
+        """Seconds between rendering a frame and hearing it, as PortAudio reports."""
+        return self._stream.latency if self._stream is not None else 0.0
+
+    # --- scheduling ---
+
+    def play(self, audio, gap: Optional[float] = None,
+             crossfade: Optional[float] = None) -> Playback:
+        """Queue audio (AudioSegment or float32 array) after everything scheduled."""
+        if isinstance(audio, AudioSegment):
+            samples = to_float(audio, self.sample_rate, self.channels)
+        else:
+            samples = np.asarray(audio, dtype=np.float32).reshape(-1, self.channels)
+        gap = self.gap if gap is None else gap
+        crossfade = self.crossfade if crossfade is None else crossfade
+        self.start()
+        with self._lock:
+            start, fade = self._next_frame, 0
+            previous = self._clips[-1] if self._clips else None
+            if previous is not None and self._cursor > self._next_frame:
+                fade = min(int(crossfade * self.sample_rate), samples.shape[0],
+                           previous.end - self._next_frame)
+                start = self._cursor + int(gap * self.sample_rate) - fade
+                if fade > 0:
+                    previous.fade_out = fade
+            clip = Playback(self, samples, start, fade_in=fade)
+            self._clips.append(clip)
+            self._cursor = max(self._cursor, clip.end)
+        return clip
+
+    def cancel(self, clip: Optional[Playback] = None):
+        """Stop clip (or everything queued) immediately.
+
+        Cancelling everything also rewinds the timeline, so the next clip
+        starts right away instead of after the cancelled ones.
+        """
+        with self._lock:
+            targets = self._clips if clip is None else [c for c in self._clips if c is clip]
+            for c in targets:
+                c.cancelled = True
+                c._rendered.set()
+            self._clips = [c for c in self._clips if not c.cancelled]
+            self._cursor = max([self._next_frame] + [c.end for c in self._clips])
+
+    @property
+    def busy(self) -> bool:
+        """True while any clip is still queued or being rendered."""
+        return bool(self._clips)
+
+    def recent_level(self) -> float:
+        """Loudest block RMS (full scale = 1.0) rendered in the last ~0.5 s."""
+        return float(self._levels.max())
+
+    def quiet_at(self) -> float:
+        """time.monotonic() at which every frame rendered so far has been heard.
+
+        Right after cancel() this is when the speaker actually goes quiet:
+        the blocks already handed to PortAudio still play out.
+        """
+        with self._lock:
+            anchor, rendered = self._anchor, self._next_frame
+        if anchor is None:
+            return time.monotonic()
+        frame, dac_time = anchor
+        return max(time.monotonic(), dac_time + (rendered - frame) / self.sample_rate)
+
+    def position(self) -> int:
+        """Stream frame currently being heard."""
+        anchor = self._anchor
+        if anchor is None:
+            return 0
+        frame, dac_time = anchor
+        heard = frame + int((time.monotonic() - dac_time) * self.sample_rate)
+        return max(0, min(heard, self._next_frame))
+
+    # --- realtime side ---
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self.underflows += 1
+        outdata.fill(0)
+        with self._lock:
+            f0 = self._next_frame
+            f1 = f0 + frames
+            # Map this block's DAC time from the stream clock to monotonic
+            dac = time_info.outputBufferDacTime or \
+                (time_info.currentTime + self.output_latency)
+            self._anchor = (f0, time.monotonic() + (dac - time_info.currentTime))
+            finished = []
+            for clip in self._clips:
+                lo, hi = max(f0, clip.start), min(f1, clip.end)
+                if lo < hi:
+                    chunk = clip.samples[lo - clip.start:hi - clip.start]
+                    if clip.fade_in or clip.fade_out:
+                        chunk = chunk * _fade_gain(clip, lo, hi)[:, None]
+                    outdata[lo - f0:hi - f0] += chunk
+                if clip.end <= f1:
+                    finished.append(clip)
+            for clip in finished:
+                self._clips.remove(clip)
+                clip._rendered.set()
+            self._next_frame = f1
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+        self._levels[self._level_idx % self._levels.shape[0]] = np.sqrt(np.mean(outdata * outdata))
+        self._level_idx += 1
+
+
+def _fade_gain(clip: Playback, lo: int, hi: int) -> np.ndarray:
+    """Linear fade-in/out gain for the clip's frames [lo, hi) on the stream timeline."""
+    idx = np.arange(lo - clip.start, hi - clip.start, dtype=np.float32)
+    gain = np.ones(hi - lo, dtype=np.float32)
+    if clip.fade_in:
+        gain = np.minimum(gain, (idx + 1) / clip.fade_in)
+    if clip.fade_out:
+        gain = np.minimum(gain, (clip.samples.shape[0] - idx) / clip.fade_out)
+    return gain
+
+
+class NullStream:
+    """OutputStream stand-in: calls the callback at the real block rate, plays nothing."""
+
+    latency = 0.0
+
+    def __init__(self, samplerate: int, channels: int, blocksize: int, callback, **_):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="null-audio")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        pass
+
+    def _run(self):
+        block = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        status = SimpleNamespace(output_underflow=False)
+        period = self.blocksize / self.samplerate
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            self.callback(block, self.blocksize,
+                          SimpleNamespace(currentTime=now, outputBufferDacTime=now), status)
+            # Absolute deadlines, so sleep jitter doesn't drift the clock
+            deadline += period
+            time.sleep(max(0.0, deadline - time.monotonic()))
+
+
+_output = None
+_output_lock = threading.Lock()
+
+
+def get_output() -> AudioOutput:
+    """Process-wide output engine shared by every player."""
+    global _output
+    with _output_lock:
+        if _output is None:
+            _output = AudioOutput(device=os.getenv("OBAMA_AUDIO_DEVICE", "").strip() or None)
+    return _output
@@ -0,0 +1,142 @@
+"""Barge-in: keep the microphone open while Obama talks, stop him when the user does.
+
+The microphone hears the robot's own voice too, so a fixed energy
+threshold would fire on every reply. The detector keeps an estimate of how
+loud the speaker's output comes back through the mic (the "coupling":
+mic RMS per unit of output RMS, learned while only the robot is talking).
+Each frame's threshold is raised to `margin` times the echo expected from
+the output stream's current level. Speech has to stay above that for
+start_ms before it counts.
+
+The last preroll_sec of microphone audio is kept. When speech triggers,
+that is snapshotted at once and the microphone stays open, buffering
+everything that follows until the next turn's transcription attach()es
+to it. The user's first words are never lost, neither while the
+interrupted turn unwinds nor to a close and reopen of the input stream.
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from utils.ringbuffer import AudioRingBuffer
+from utils.vad import EnergyVAD
+
+
+class BargeInDetector:
+    """Echo-aware speech detector for the capture stream during playback.
+
+    energy_threshold is the floor (16-bit RMS, as in EnergyVAD) used while
+    the robot is silent. coupling is the starting echo estimate: mic RMS
+    (16-bit scale) when the output plays at full scale.
+    """
+
+    def __init__(self, output=None, sample_rate: int = 16000,
+                 energy_threshold: float = 1500, margin: float = 3.0,
+                 coupling: float = 3000.0, adapt_rate: float = 0.02,
+                 start_ms: float = 150, preroll_sec: float = 1.0, device=None):
+        if output is None:
+            from utils.audio_out import get_output
+            output = get_output()
+        self.output = output
+        self.sample_rate = sample_rate
+        self.energy_threshold = energy_threshold
+        self.margin = margin
+        self.coupling = coupling
+        self.adapt_rate = adapt_rate
+        self.start_ms = start_ms
+        self.device = device
+        self.ring = AudioRingBuffer(int(preroll_sec * sample_rate))
+        self.triggered_at: Optional[float] = None
+        self.vad: Optional[EnergyVAD] = None
+        self._on_speech: Optional[Callable[[], None]] = None
+        self._captured: List[np.ndarray] = []  # audio from preroll before the trigger on
+        self._sink: Optional[Callable[[np.ndarray], None]] = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    def start(self, on_speech: Callable[[], None]):
+        """Listen for speech; on_speech is called once, from the audio thread.
+
+        Opens the microphone unless it is still open.
+        """
+        with self._lock:
+            self.vad = EnergyVAD(self.sample_rate, self.energy_threshold,
+                                 start_ms=self.start_ms, dynamic=False)
+            self.ring.clear()
+            self.triggered_at = None
+            self._captured = []
+            self._sink = None
+            self._on_speech = on_speech
+            if self._stream is not None:
+                return
+            # Imported here so headless callers (benchmarks, the fleet
+            # server) don't need PortAudio
+            import sounddevice as sd
+
+            self._stream = sd.InputStream(
+                samplerate=self.sample_rate, channels=1, dtype="float32",
+                blocksize=self.vad.frame, device=self.device,
+                callback=self._callback)
+            self._stream.start()
+
+    def hand_off(self) -> Optional["BargeInDetector"]:
+        """The detector, microphone still open, if speech triggered; else close it and return None."""
+        if self.triggered_at is None:
+            self.stop()
+            return None
+        return self
+
+    def attach(self, sink: Callable[[np.ndarray], None]):
+        """Give the open microphone to sink, e.g. the next turn's transcription.
+
+        sink first gets everything captured from preroll_sec before the
+        trigger on, then each new block (float32, on the audio thread)
+        until stop().
+        """
+        with self._lock:
+            captured, self._captured = self._captured, []
+            for samples in captured:
+                sink(samples)
+            self._sink = sink
+
+    def stop(self):
+        """Close the microphone."""
+        with self._lock:
+            stream, self._stream = self._stream, None
+            self._sink = None
+            self._captured = []
+        if stream is not None:
+            stream.stop()
+            stream.close()
+
+    def _callback(self, indata, frames, time_info, status):
+        samples = indata[:, 0]
+        with self._lock:
+            if self._sink is not None:
+                self._sink(samples)
+                return
+            if self.triggered_at is not None:
+                # Hold on to the user's words until someone attach()es
+                self._captured.append(samples.copy())
+                return
+        self.ring.write(samples)
+        vad = self.vad
+        out = self.output.recent_level()
+        echo = self.coupling * out
+        vad.energy_threshold = max(self.energy_threshold, self.margin * echo)
+        rms = float(np.sqrt(np.mean(samples * samples))) * 32768.0
+        if out > 0.02 and not vad.in_speech and rms < vad.energy_threshold:
+            # Only the robot is audible: track how loud it comes back
+            self.coupling += self.adapt_rate * (rms / out - self.coupling)
+        vad.process(samples)
+        if vad.triggered and self.triggered_at is None:
+            with self._lock:
+                # Snapshot now: the ring would overwrite the onset while the
+                # interrupted turn unwinds
+                self._captured = [self.ring.latest(self.ring.capacity).copy()]
+                self.triggered_at = time.monotonic()
+            if self._on_speech is not None:
+                self._on_speech()
@@ -0,0 +1,86 @@
+"""Obama-style chat replies from OpenAI, optionally streamed sentence by sentence.
+
+Shared by the conversation loop (talk_to_obama.py) and the fleet server.
+"""
+
+import time
+from typing import Callable, Optional
+
+from openai import OpenAI
+
+from utils.pipeline import SentenceBuffer
+from utils.tracing import event, span
+
+
+def chat_obama_style(client: OpenAI, user_text: str, history_messages=None,
+                     stream: bool = False,
+                     on_sentence: Optional[Callable[[str], None]] = None,
+                     timings: Optional[dict] = None) -> str:
+    """Get a ChatGPT response styled like President Obama.
+
+    With stream=True tokens are consumed as they arrive and every completed
+    sentence is handed to on_sentence right away (e.g. SpeechPipeline.feed).
+    The full reply is still returned for the history. If a timings dict is
+    given, seconds since the request for the first token, first sentence and
+    completion are recorded in it.
+    """
+    print("Obama is thinking...")
+    system_prompt = (
+        "You are President Barack Obama. Respond in his tone: thoughtful, measured, dignified, and inspiring. "
+        "Use signature Obama-isms sparingly but recognizably (e.g., 'Let me be clear', 'folks', 'not red states or blue states', 'that's not who we are'). "
+        "Be warm, optimistic, and unifying. Keep responses concise and conversational for audio."
+        "Always keep your responses short and to the point. Only say MAXIMUM ONE SENTENCE. AT MOST 5-12 WORDS. DONT TALK TOO MUCH"
+        "Always be EXTREMELY OPINIONATED about any topic. ALWAYS EXPRESS AND DEFEND YOUR OPINION TO DEATH, even if the opinion may be controversial."
+    )
+    messages = [{"role": "system", "content": system_prompt}]
+    if history_messages:
+        messages.extend(history_messages)
+    messages.append({"role": "user", "content": user_text})
+    timings = timings if timings is not None else {}
+    with span("llm_request", stream=stream, messages=len(messages)):
+        return _chat(client, messages, stream, on_sentence, timings)
+
+
+def _chat(client: OpenAI, messages, stream: bool,
+          on_sentence: Optional[Callable[[str], None]], timings: dict) -> str:
+    start = time.perf_counter()
+    resp = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=messages,
+        temperature=0.8,
+        max_tokens=250,
+        stream=stream,
+    )
+    if not stream:
+        reply = resp.choices[0].message.content.strip()
+        timings["llm_first_token"] = timings["llm_done"] = time.perf_counter() - start
+        if on_sentence is not None and reply:
+            on_sentence(reply)
+        print("Obama:", reply)
+        return reply
+
+    parts = []
+    sentences = SentenceBuffer()
+
+    def _emit(done):
+        for sentence in done:
+            timings.setdefault("llm_first_sentence", time.perf_counter() - start)
+            if on_sentence is not None:
+                on_sentence(sentence)
+
+    for chunk in resp:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if "llm_first_token" not in timings:
+            timings["llm_first_token"] = time.perf_counter() - start
+            event("llm_first_token")
+        parts.append(delta)
+        _emit(sentences.push(delta))
+    _emit(sentences.flush())
+    timings["llm_done"] = time.perf_counter() - start
+    reply = "".join(parts).strip()
+    print("Obama:", reply)
+    return reply
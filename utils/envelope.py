@@ -0,0 +1,115 @@
+"""Mouth-movement envelopes: per-frame loudness, precomputed before playback.
+
+compute_envelope() turns a whole clip into one value in [0, 1] per
+`interval` seconds in a single vectorized pass, so the real-time servo loop
+only has to index into an array. envelope_for_file() additionally keeps a
+compact uint8 sidecar per clip (keyed by the file's content hash) so clips
+from mp3s/ are only analysed once.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+SIDECAR_DIR = ".envelopes"
+
+
+def frame_hop(sample_rate: int, interval: float = 0.01) -> int:
+    """Samples per envelope frame; also what the servo loop steps by."""
+    return max(1, int(interval * sample_rate))
+
+
+def compute_envelope(samples: np.ndarray, sample_rate: int, interval: float = 0.01,
+                     smoothing: int = 1, attack: float = 0.0,
+                     release: float = 0.0) -> np.ndarray:
+    """RMS envelope of mono samples, normalized by the clip's peak sample.
+
+    smoothing: moving-average width in frames (1 = off).
+    attack / release: time constants in seconds for a rise/fall follower
+    (0 = follow instantly), e.g. a slower release keeps the jaw from
+    snapping shut between syllables.
+    """
+    samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+    if samples.size == 0:
+        return np.zeros(0, dtype=np.float32)
+    peak = float(np.max(np.abs(samples)))
+    if peak > 0:
+        samples = samples / peak
+
+    hop = frame_hop(sample_rate, interval)
+    n_frames = -(-samples.shape[0] // hop)
+    padded = np.zeros(n_frames * hop, dtype=np.float32)
+    padded[:samples.shape[0]] = samples
+    frames = padded.reshape(n_frames, hop)
+    env = np.sqrt(np.mean(frames * frames, axis=1))
+    # The last frame is mostly padding; rescale to its real length
+    tail = samples.shape[0] - (n_frames - 1) * hop
+    env[-1] *= np.sqrt(hop / tail)
+
+    if smoothing > 1:
+        kernel = np.ones(smoothing, dtype=np.float32) / smoothing
+        env = np.convolve(env, kernel, mode="same")
+
+    if attack > 0 or release > 0:
+        frame_sec = hop / sample_rate
+        a_up = 1.0 - np.exp(-frame_sec / attack) if attack > 0 else 1.0
+        a_down = 1.0 - np.exp(-frame_sec / release) if release > 0 else 1.0
+        out = np.empty_like(env)
+        level = 0.0
+        for i, target in enumerate(env.tolist()):
+            level += (target - level) * (a_up if target > level else a_down)
+            out[i] = level
+        env = out
+
+    return np.clip(env, 0.0, 1.0).astype(np.float32)
+
+
+def envelope_for_segment(audio, interval: float = 0.01, **shaping) -> np.ndarray:
+    """compute_envelope for a pydub AudioSegment (downmixed to mono)."""
+    mono = audio.set_channels(1)
+    samples = np.array(mono.get_array_of_samples())
+    return compute_envelope(samples, mono.frame_rate, interval, **shaping)
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def sidecar_path(path: str, interval: float = 0.01, **shaping) -> str:
+    params = f"{interval:g}" + "".join(f"-{k}{v:g}" for k, v in sorted(shaping.items()))
+    return os.path.join(os.path.dirname(os.path.abspath(path)), SIDECAR_DIR,
+                        f"{_file_hash(path)}-{params}.npy")
+
+
+def envelope_for_file(path: str, audio=None, interval: float = 0.01,
+                      **shaping) -> np.ndarray:
+    """Envelope for an audio file, read from / written to its sidecar.
+
+    audio: the already-decoded AudioSegment for path, if the caller has
+    one. Otherwise samples come from the decoded-PCM cache, so computing
+    an envelope never costs an extra ffmpeg decode.
+    """
+    sidecar = sidecar_path(path, interval, **shaping)
+    try:
+        return np.load(sidecar).astype(np.float32) / 255.0
+    except (FileNotFoundError, ValueError, OSError):
+        pass
+    if audio is not None:
+        env = envelope_for_segment(audio, interval, **shaping)
+    else:
+        try:
+            from utils.pcm_cache import load_mono
+        except ImportError:  # run as a script from inside utils/
+            from pcm_cache import load_mono
+        samples, sample_rate = load_mono(path)
+        env = compute_envelope(samples, sample_rate, interval, **shaping)
+    os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+    tmp = sidecar + ".tmp.npy"
+    np.save(tmp, np.round(env * 255).astype(np.uint8))
+    os.replace(tmp, sidecar)
+    return env
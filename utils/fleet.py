@@ -0,0 +1,428 @@
+"""Fleet mode: one host runs speech recognition, chat and TTS for many robots.
+
+Robots (robot_client.py) stream microphone audio up. They get PCM plus a
+mouth envelope (the servo timeline) back over a small TCP protocol. Every
+message is one frame:
+
+    !II (header length, payload length) | JSON header | binary payload
+
+    robot -> server
+        hello       {"robot": name}
+        audio       payload: 16 kHz mono int16 PCM, sent as it is captured
+        end         the utterance is over; transcribe it and answer
+        text        {"text": ...}; typed input, skips STT
+        bye
+    server -> robot
+        welcome     {"session": id}
+        transcript  {"text": ...}
+        chunk       {"index", "text", "sample_rate", "interval", "envelope"}
+                    payload: mono int16 PCM. envelope holds mouth openings
+                    0-255, one per `interval` seconds of audio.
+        turn_end    {"reply", "timings"}; ends every turn, failed ones too
+        error       {"message"}
+
+Each robot gets its own session and conversation history. The expensive
+stages are shared. STT, chat and TTS each have a fixed pool of workers.
+Workers take jobs from a FairQueue, round-robin across robots, so a robot
+with a long reply queued can't starve the others.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import socket
+import struct
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.envelope import envelope_for_segment
+from utils.generate import synthesize_audio_async
+from utils.history import ConversationHistory
+from utils.orchestrator import run_blocking
+from utils.pipeline import split_for_tts, stream_sentences
+from utils.tracing import begin_turn, event, get_tracer
+
+DEFAULT_PORT = 7000
+CAPTURE_RATE = 16000
+ENVELOPE_INTERVAL = 0.01
+
+_PREFIX = struct.Struct("!II")
+MAX_FRAME = 32 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode(kind: str, payload: bytes = b"", **fields) -> bytes:
+    header = json.dumps({"type": kind, **fields}).encode()
+    return _PREFIX.pack(len(header), len(payload)) + header + payload
+
+
+def _decode_header(prefix: bytes) -> Tuple[int, int]:
+    header_len, payload_len = _PREFIX.unpack(prefix)
+    if header_len + payload_len > MAX_FRAME:
+        raise ProtocolError(f"frame of {header_len + payload_len} bytes is too large")
+    return header_len, payload_len
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+    """Next (header, payload); raises asyncio.IncompleteReadError on EOF."""
+    header_len, payload_len = _decode_header(await reader.readexactly(_PREFIX.size))
+    header = json.loads(await reader.readexactly(header_len))
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+
+async def write_message(writer: asyncio.StreamWriter, kind: str,
+                        payload: bytes = b"", **fields):
+    writer.write(encode(kind, payload, **fields))
+    await writer.drain()
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    data = bytearray()
+    while len(data) < n:
+        block = sock.recv(n - len(data))
+        if not block:
+            raise ConnectionError("server closed the connection")
+        data += block
+    return bytes(data)
+
+
+def recv_message(sock: socket.socket) -> Tuple[dict, bytes]:
+    """Blocking read_message for the robot side."""
+    header_len, payload_len = _decode_header(_recv_exactly(sock, _PREFIX.size))
+    header = json.loads(_recv_exactly(sock, header_len))
+    return header, _recv_exactly(sock, payload_len) if payload_len else b""
+
+
+def send_message(sock: socket.socket, kind: str, payload: bytes = b"", **fields):
+    sock.sendall(encode(kind, payload, **fields))
+
+
+class FairQueue:
+    """Jobs queued per owner and handed out round-robin across owners.
+
+    Each get() takes the oldest job of the next owner in turn, so an owner
+    with many jobs queued delays everyone else by at most one job per round.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, deque] = {}
+        self._order: deque = deque()  # owners with pending jobs, next first
+        self._count = asyncio.Semaphore(0)
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._jobs.values())
+
+    def put_nowait(self, owner: str, job):
+        jobs = self._jobs.get(owner)
+        if jobs is None:
+            jobs = self._jobs[owner] = deque()
+            self._order.append(owner)
+        jobs.append(job)
+        self._count.release()
+        self.max_depth = max(self.max_depth, len(self))
+
+    async def get(self):
+        await self._count.acquire()
+        owner = self._order.popleft()
+        jobs = self._jobs[owner]
+        job = jobs.popleft()
+        if jobs:
+            self._order.append(owner)
+        else:
+            del self._jobs[owner]
+        return owner, job
+
+
+class Session:
+    """One connected robot: its history, current utterance and turn."""
+
+    def __init__(self, session_id: str, robot: str, writer: asyncio.StreamWriter,
+                 history: ConversationHistory):
+        self.id = session_id
+        self.robot = robot
+        self.writer = writer
+        self.history = history
+        self.utterance = bytearray()
+        self.turns = 0
+        self.turn: Optional[asyncio.Task] = None
+        self.pending = set()  # futures of this robot's queued or running jobs
+
+    async def send(self, kind: str, payload: bytes = b"", **fields):
+        await write_message(self.writer, kind, payload, **fields)
+
+
+class FleetServer:
+    """Serves every connected robot from one STT model, chat client and TTS client.
+
+    transcribe(audio) -> text takes 16 kHz float32 audio. It defaults to
+    the shared Whisper backend for `model`. With stt_batch > 1, utterances
+    from different robots are transcribed together in batches of up to
+    stt_batch (see utils.stt_batch). replies (utils.reply_cache) is
+    shared across robots when given; booth questions repeat from robot to
+    robot too.
+    """
+
+    def __init__(self, client=None, model: str = "medium",
+                 transcribe: Optional[Callable[[np.ndarray], str]] = None,
+                 replies=None, stt_workers: int = 1, llm_workers: int = 4,
+                 tts_workers: int = 4, volume_factor: float = 4.0,
+                 max_chars: int = 120, history_budget: int = 800,
+                 stt_batch: int = 1, stt_batch_wait_ms: float = 30.0):
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI()
+        self.stt_batcher = None
+        if transcribe is None:
+            from utils.transcribe import get_transcriber
+            backend = get_transcriber(model)
+            if stt_batch > 1:
+                from utils.stt_batch import get_batched
+                backend = self.stt_batcher = get_batched(backend, stt_batch, stt_batch_wait_ms)
+                # Enough transcriptions in flight to fill a batch
+                stt_workers = max(stt_workers, stt_batch)
+
+            def transcribe(audio: np.ndarray) -> str:
+                return backend.transcribe(audio).get("text", "").strip()
+        self.client = client
+        self.transcribe = transcribe
+        self.replies = replies
+        self.volume_factor = volume_factor
+        self.max_chars = max_chars
+        self.history_budget = history_budget
+        self.workers = {"stt": stt_workers, "llm": llm_workers, "tts": tts_workers}
+        self.queues: Dict[str, FairQueue] = {}
+        self.sessions: Dict[str, Session] = {}
+        self._ids = itertools.count(1)
+        self._tasks = []
+
+    # --- lifetime ---
+
+    async def start(self, host: str = "0.0.0.0",
+                    port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        for stage, count in self.workers.items():
+            self.queues[stage] = FairQueue()
+            self._tasks += [asyncio.create_task(self._worker(self.queues[stage]))
+                            for _ in range(count)]
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def serve(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT):
+        server = await self.start(host, port)
+        print(f"Fleet server listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def stats(self) -> dict:
+        stats = {
+            "robots": len(self.sessions),
+            "queued": {stage: len(q) for stage, q in self.queues.items()},
+            "max_queued": {stage: q.max_depth for stage, q in self.queues.items()},
+        }
+        if self.stt_batcher is not None:
+            stats["stt_batch"] = self.stt_batcher.stats()
+        return stats
+
+    # --- scheduling ---
+
+    def _submit(self, stage: str, session: Session, fn: Callable, *args) -> asyncio.Future:
+        """Queue fn(*args) on the stage's worker pool on behalf of session.
+
+        Plain functions run on a thread; coroutine functions run on the loop
+        and are cancelled along with the returned future. Either way the job
+        runs in the submitting turn's context, so its trace records carry
+        that turn's id.
+        """
+        future = asyncio.get_running_loop().create_future()
+        session.pending.add(future)
+        future.add_done_callback(session.pending.discard)
+        self.queues[stage].put_nowait(
+            session.id, (fn, args, future, contextvars.copy_context()))
+        return future
+
+    async def _worker(self, queue: FairQueue):
+        while True:
+            _, (fn, args, future, context) = await queue.get()
+            if future.done():  # robot left or turn cancelled
+                continue
+            if asyncio.iscoroutinefunction(fn):
+                # The task copies the context current at its creation
+                job = context.run(asyncio.ensure_future, fn(*args))
+                # Cancelling the turn stops the job too (e.g. FineShare polling)
+                future.add_done_callback(lambda _, job=job: job.cancel())
+            else:
+                job = context.run(run_blocking, fn, *args)
+            await asyncio.wait({job})
+            if future.done():
+                continue
+            if job.cancelled():
+                future.cancel()
+            elif job.exception() is not None:
+                future.set_exception(job.exception())
+            else:
+                future.set_result(job.result())
+
+    # --- connections ---
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = None
+        try:
+            header, _ = await read_message(reader)
+            if header.get("type") != "hello":
+                raise ProtocolError("expected hello")
+            session = Session(f"s{next(self._ids)}", header.get("robot") or "robot", writer,
+                              ConversationHistory(self.client, budget=self.history_budget))
+            self.sessions[session.id] = session
+            print(f"[{session.robot}] connected ({len(self.sessions)} robots)")
+            await session.send("welcome", session=session.id)
+            while True:
+                header, payload = await read_message(reader)
+                kind = header.get("type")
+                if kind == "audio":
+                    session.utterance += payload
+                elif kind == "end":
+                    audio, session.utterance = bytes(session.utterance), bytearray()
+                    self._start_turn(session, audio=audio)
+                elif kind == "text":
+                    self._start_turn(session, text=header.get("text", ""))
+                elif kind == "bye":
+                    break
+                else:
+                    await session.send("error", message=f"unknown message type {kind!r}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ProtocolError as e:
+            print(f"Fleet protocol error: {e}")
+        finally:
+            if session is not None:
+                await self._close(session)
+            writer.close()
+
+    async def _close(self, session: Session):
+        self.sessions.pop(session.id, None)
+        if session.turn is not None:
+            session.turn.cancel()
+            await asyncio.gather(session.turn, return_exceptions=True)
+        for future in list(session.pending):
+            future.cancel()
+        print(f"[{session.robot}] disconnected after {session.turns} turns")
+
+    def _start_turn(self, session: Session, audio: Optional[bytes] = None,
+                    text: Optional[str] = None):
+        # A robot's turns run one after another, in the order they arrived
+        session.turn = asyncio.create_task(
+            self._turn(session, audio=audio, text=text, after=session.turn))
+
+    # --- one turn ---
+
+    async def _turn(self, session: Session, audio: Optional[bytes], text: Optional[str],
+                    after: Optional[asyncio.Task]):
+        if after is not None:
+            await asyncio.gather(after, return_exceptions=True)
+        begin_turn()
+        event("capture_end", robot=session.robot)
+        start = time.perf_counter()
+        timings = {}
+        reply, error = "", None
+        try:
+            if text is None:
+                samples = np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+                text = await self._submit("stt", session, self.transcribe, samples)
+                timings["stt_ms"] = (time.perf_counter() - start) * 1000
+                await session.send("transcript", text=text)
+            if text.strip():
+                reply = await self._reply(session, text, timings, start)
+                session.history.add_turn(text, reply)
+            session.turns += 1
+            timings["total_ms"] = (time.perf_counter() - start) * 1000
+            print(f"[{session.robot}] turn {session.turns}: " + " ".join(
+                f"{k}={v:.0f}" for k, v in timings.items()))
+        except Exception as e:
+            print(f"[{session.robot}] turn failed: {e}")
+            error = e
+        try:
+            # The robot waits for turn_end, so a failed turn still gets one
+            if error is not None:
+                await session.send("error", message=str(error))
+            await session.send("turn_end", reply=reply, timings=timings)
+        except ConnectionError:
+            pass  # robot already gone; _handle cleans up
+        finally:
+            get_tracer().flush()
+
+    async def _reply(self, session: Session, text: str, timings: dict, start: float) -> str:
+        """Stream the chat reply into TTS and send chunks to the robot in order."""
+        loop = asyncio.get_running_loop()
+        ready: asyncio.Queue = asyncio.Queue()
+
+        def queue_chunk(chunk: str):
+            ready.put_nowait((chunk, self._submit("tts", session, self._render, chunk)))
+
+        def emit(sentence: str):
+            # Chat thread: TTS for each sentence starts as soon as it's complete
+            for chunk in split_for_tts(sentence, max_chars=self.max_chars):
+                loop.call_soon_threadsafe(queue_chunk, chunk)
+
+        async def respond() -> str:
+            try:
+                return await self._submit("llm", session, self._respond, session, text, emit)
+            finally:
+                # After every queue_chunk callback the chat thread scheduled
+                ready.put_nowait(None)
+
+        reply_task = asyncio.create_task(respond())
+        try:
+            index = 0
+            while True:
+                item = await ready.get()
+                if item is None:
+                    break
+                chunk, future = item
+                try:
+                    pcm, rate, envelope = await future
+                except Exception as e:
+                    await session.send("error", message=f"TTS failed for {chunk!r}: {e}")
+                    continue
+                if index == 0:
+                    timings["first_chunk_ms"] = (time.perf_counter() - start) * 1000
+                await session.send("chunk", pcm, index=index, text=chunk, sample_rate=rate,
+                                   interval=ENVELOPE_INTERVAL, envelope=envelope)
+                index += 1
+            return await reply_task
+        finally:
+            reply_task.cancel()
+
+    def _respond(self, session: Session, text: str, emit: Callable[[str], None]) -> str:
+        from utils.chat import chat_obama_style
+
+        if self.replies is not None:
+            cached = self.replies.lookup(text)
+            if cached is not None:
+                for sentence in stream_sentences(cached):
+                    emit(sentence)
+                return cached
+        reply = chat_obama_style(self.client, text,
+                                 history_messages=session.history.messages(text),
+                                 stream=True, on_sentence=emit)
+        if self.replies is not None:
+            self.replies.add(text, reply)
+        return reply
+
+    async def _render(self, chunk: str):
+        """(int16 PCM bytes, sample rate, envelope 0-255) for one chunk."""
+        audio = await synthesize_audio_async(chunk, volume_factor=self.volume_factor)
+
+        def pack():
+            mono = audio.set_channels(1).set_sample_width(2)
+            envelope = envelope_for_segment(mono, ENVELOPE_INTERVAL)
+            levels = np.clip(np.round(np.asarray(envelope) * 255), 0, 255).astype(int).tolist()
+            return mono.raw_data, mono.frame_rate, levels
+
+        return await asyncio.to_thread(pack)
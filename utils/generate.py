@@ -1,14 +1,51 @@
 """FineShare Obama TTS helpers.
 
 Reads FINESHARE_API_TOKEN from environment (or .env via caller) to authorize.
+
+Synthesized clips are kept in a content-addressed on-disk cache (see
+TTSCache) so repeated lines skip the FineShare round trip entirely.
+synthesize_audio() is the playback path: it decodes the MP3 once in memory
+and returns gain-adjusted PCM, without writing anything to disk.
 """
 
 import requests
 import time
 import os
-import math
+import json
+import asyncio
+import atexit
+import hashlib
+import threading
+import unicodedata
+from contextlib import contextmanager
 from io import BytesIO
+from typing import Callable, Iterable, Optional
+import numpy as np
 from pydub import AudioSegment
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from utils.tracing import event, span
+except ImportError:  # run as a script from inside utils/
+    from tracing import event, span
+
+
+DEFAULT_VOICE = "obama-228616"
+
+# Overridable so the benchmarks can point the client at local stand-ins
+GENERATE_URL = os.getenv("OBAMA_TTS_GENERATE_URL",
+                         "https://converter.fineshare.com/api/fsmstexttospeech")
+LIST_URL = os.getenv("OBAMA_TTS_LIST_URL",
+                     "https://voiceai.fineshare.com/api/listmyvoicefiles")
+
+# Location and size cap of the synthesized-audio cache
+CACHE_DIR = os.getenv(
+    "OBAMA_TTS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), ".tts_cache"),
+)
+CACHE_MAX_BYTES = int(os.getenv("OBAMA_TTS_CACHE_MAX_MB", "200")) * 1024 * 1024
 
 
 def _headers():
@@ -24,24 +61,25 @@ def _headers():
     }
 
 
-def generate_tts(text: str):
-    url = "https://converter.fineshare.com/api/fsmstexttospeech"
-    data = {
+def _build_payload(text: str, voice: str = DEFAULT_VOICE, style: str = "normal",
+                   style_degree: float = 1, rate: float = 0.0, pitch: float = 0.0,
+                   speed: float = 1):
+    return {
         "engine": "gpt-api",
         "appId": "107",
         "featureId": "22",
-        "speech": f"<mstts:express-as style=\"normal\" styledegree=\"1\"><prosody rate=\"0.0%\" pitch=\"+0.00%\">{text}</prosody></mstts:express-as>",
-        "voice": "obama-228616",
+        "speech": f"<mstts:express-as style=\"{style}\" styledegree=\"{style_degree}\"><prosody rate=\"{rate:.1f}%\" pitch=\"{pitch:+.2f}%\">{text}</prosody></mstts:express-as>",
+        "voice": voice,
         "Speed": 3,
         "ChangerType": 3,
         "designUuid": None,
-        "platform": "web-app-tts-obama-228616",
+        "platform": f"web-app-tts-{voice}",
         "Parameter": {
-            "speed": 1,
+            "speed": speed,
             "languageCode": "en-US",
             "outputSpeed": 1,
             "outputGender": 1,
-            "name": "obama-228616",
+            "name": voice,
             "ssml": True,
             "effect": None,
             "amotion": None,
@@ -49,57 +87,516 @@ def generate_tts(text: str):
         }
     }
 
-    resp = requests.post(url, headers=_headers(), json=data, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    if data.get("available_count", 1) == 0:
-        raise Exception("No available TTS")
-    return data
+
+# Keys FineShare has used for a job / file identifier
+_ID_KEYS = ("id", "uuid", "fileId", "fileUuid", "voiceFileId", "taskId")
+
+
+def _job_id(data) -> Optional[str]:
+    """Pull a job identifier out of a generate/list response, if present."""
+    for scope in (data, data.get("data") if isinstance(data, dict) else None):
+        if isinstance(scope, dict):
+            for k in _ID_KEYS:
+                if scope.get(k):
+                    return str(scope[k])
+    return None
+
+
+def _parse_voice_files(data: dict):
+    """(entry, file_url) pairs from a listmyvoicefiles response."""
+    # Try multiple known response shapes
+    # Shape A: { "files": [ { "cover": { "url": "..." } } ] }
+    files = data.get("files")
+    if isinstance(files, list):
+        return [(f, (f.get("cover") or {}).get("url")) for f in files if isinstance(f, dict)]
+    # Shape B: { "data": { "list": [ { "fileUrl": "..." } ] } }
+    entries = (data.get("data") or {}).get("list") or []
+    return [(e, e.get("fileUrl")) for e in entries if isinstance(e, dict)]
 
 
-def fetch_latest_mp3():
-    url = "https://voiceai.fineshare.com/api/listmyvoicefiles?page=0&limit=1&status=4"
+def _matches_job(entry: dict, job_id: Optional[str], text: Optional[str]) -> bool:
+    """Whether a listed file belongs to the job.
+
+    Entries that expose no id (or no text) can't be correlated and are
+    accepted, which degrades to the old newest-file behaviour.
+    """
+    if job_id is not None:
+        entry_id = _job_id(entry)
+        return entry_id is None or entry_id == job_id
+    if text is not None:
+        fields = [entry[k] for k in ("text", "speech", "content", "title")
+                  if isinstance(entry.get(k), str)]
+        return not fields or any(text in f for f in fields)
+    return True
+
+
+def _poll_schedule(first_interval: float, backoff: float, max_interval: float):
+    interval = first_interval
     while True:
-        resp = requests.get(url, headers=_headers(), timeout=30)
+        yield interval
+        interval = min(interval * backoff, max_interval)
+
+
+class TTSClient:
+    """FineShare client holding one keep-alive, connection-pooled session.
+
+    Every request (generate, each poll, the MP3 download) reuses pooled
+    connections instead of paying a fresh TCP+TLS handshake. Idempotent
+    requests and connection failures are retried with backoff. The *_async
+    methods expose the same operations to asyncio code; waiting between
+    polls uses asyncio.sleep, so many jobs can be in flight on one loop.
+    """
+
+    def __init__(self, connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 retries: int = 3, backoff_factor: float = 0.3, pool_size: int = 8):
+        self.timeout = (connect_timeout, read_timeout)
+        # Synthesis jobs currently submitted and not yet downloaded, and a
+        # running average of how long one takes end to end
+        self.in_flight = 0
+        self.latency_ewma = 3.0
+        self._stats_lock = threading.Lock()
+        self._headers = _headers()
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    @contextmanager
+    def _track_job(self):
+        with self._stats_lock:
+            self.in_flight += 1
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+                if ok:
+                    self.latency_ewma += 0.3 * (time.monotonic() - start - self.latency_ewma)
+
+    def expected_wait(self) -> float:
+        """Rough seconds until a job submitted now is downloaded.
+
+        FineShare works through an account's jobs roughly one after
+        another, so a deeper queue means a longer wait.
+        """
+        with self._stats_lock:
+            return self.latency_ewma * max(1, self.in_flight)
+
+    # --- blocking API ---
+
+    def generate(self, text: str, **voice) -> dict:
+        """Submit a synthesis job; returns the FineShare response."""
+        with span("tts_submit", chars=len(text)):
+            resp = self.session.post(GENERATE_URL, headers=self._headers,
+                                     json=_build_payload(text, **voice), timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+        if data.get("available_count", 1) == 0:
+            raise Exception("No available TTS")
+        # Remember what was asked for so polling can find this job's file
+        data["_text"] = text
+        return data
+
+    def list_voice_files(self, limit: int):
+        resp = self.session.get(f"{LIST_URL}?page=0&limit={limit}&status=4",
+                                headers=self._headers, timeout=self.timeout)
         resp.raise_for_status()
-        data = resp.json()
-        # Try multiple known response shapes
-        file_url = None
+        return _parse_voice_files(resp.json())
+
+    def _ready_url(self, job_id, text, correlated) -> Optional[str]:
+        with span("tts_poll") as sp:
+            for entry, file_url in self.list_voice_files(10 if correlated else 1):
+                if file_url and _matches_job(entry, job_id, text):
+                    sp.set(ready=True)
+                    return file_url
+            sp.set(ready=False)
+            return None
+
+    def wait_for_mp3(self, job: Optional[dict] = None, timeout: float = 60.0,
+                     first_interval: float = 0.15, backoff: float = 1.6,
+                     max_interval: float = 1.5) -> str:
+        """Poll until the file for job (as returned by generate) is ready.
+
+        Polls quickly at first and backs off geometrically up to max_interval,
+        returning as soon as the matching file shows up. Files are matched on
+        the job id, else on the submitted text; without a job (or when the
+        listing carries neither) the newest file on the account is used.
+        Raises TimeoutError after timeout seconds.
+        """
+        job_id = _job_id(job) if job else None
+        text = job.get("_text") if (job and job_id is None) else None
+        correlated = job_id is not None or text is not None
+        deadline = time.monotonic() + timeout
+        for interval in _poll_schedule(first_interval, backoff, max_interval):
+            file_url = self._ready_url(job_id, text, correlated)
+            if file_url:
+                return file_url
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"TTS job {job_id or '(latest)'} not ready after {timeout:.0f}s")
+            time.sleep(min(interval, remaining))
+
+    def download(self, file_url: str) -> bytes:
+        # No auth headers: the file lives on FineShare's CDN
+        with span("download") as sp:
+            resp = self.session.get(file_url, timeout=(self.timeout[0], 60))
+            resp.raise_for_status()
+            sp.set(bytes=len(resp.content))
+        return resp.content
+
+    def save_mp3(self, file_url, filename="output.mp3", volume_factor=4):
+        """Download MP3, increase volume, and save.
+
+        volume_factor: linear amplitude multiplier (1.5 = +50%).
+        Requires ffmpeg installed and accessible for pydub.
+        """
+        louder = apply_gain(decode_mp3(self.download(file_url)), volume_factor)
+        louder.export(filename, format="mp3")
+        print(f"Saved MP3 as {filename} (x{volume_factor:g})")
+
+    def synthesize_bytes(self, text: str, cache: Optional["TTSCache"] = None,
+                         on_miss: Optional[Callable[[], None]] = None, **voice) -> bytes:
+        """FineShare's MP3 for text, as downloaded, synthesizing only on a cache miss.
+
+        on_miss is called right after the FineShare job is submitted (e.g. to
+        start filler audio).
+        """
+        key = TTSCache.key(text, **voice)
+        if cache is not None:
+            content = cache.read(key)
+            if content is not None:
+                print("TTS cache hit")
+                event("tts_cache_hit")
+                return content
+
+        with self._track_job():
+            job = self.generate(text, **voice)
+            if on_miss is not None:
+                on_miss()
+            content = self.download(self.wait_for_mp3(job))
+        if cache is not None:
+            cache.put(key, content, text)
+        return content
+
+    def synthesize_audio(self, text: str, volume_factor: float = 4.0,
+                         cache: Optional["TTSCache"] = None,
+                         on_miss: Optional[Callable[[], None]] = None,
+                         **voice) -> AudioSegment:
+        """Decoded, gain-adjusted audio for text, ready to play.
+
+        The MP3 is decoded exactly once, in memory; nothing touches disk.
+        """
+        content = self.synthesize_bytes(text, cache=cache, on_miss=on_miss, **voice)
+        with span("decode"):
+            return apply_gain(decode_mp3(content), volume_factor)
+
+    # --- asyncio API ---
+
+    async def generate_async(self, text: str, **voice) -> dict:
+        return await asyncio.to_thread(self.generate, text, **voice)
+
+    async def wait_for_mp3_async(self, job: Optional[dict] = None, timeout: float = 60.0,
+                                 first_interval: float = 0.15, backoff: float = 1.6,
+                                 max_interval: float = 1.5) -> str:
+        """Async wait_for_mp3; sleeps on the event loop between polls."""
+        job_id = _job_id(job) if job else None
+        text = job.get("_text") if (job and job_id is None) else None
+        correlated = job_id is not None or text is not None
+        deadline = time.monotonic() + timeout
+        for interval in _poll_schedule(first_interval, backoff, max_interval):
+            file_url = await asyncio.to_thread(self._ready_url, job_id, text, correlated)
+            if file_url:
+                return file_url
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"TTS job {job_id or '(latest)'} not ready after {timeout:.0f}s")
+            await asyncio.sleep(min(interval, remaining))
+
+    async def download_async(self, file_url: str) -> bytes:
+        return await asyncio.to_thread(self.download, file_url)
+
+    async def synthesize_bytes_async(self, text: str, cache: Optional["TTSCache"] = None,
+                                     on_miss: Optional[Callable[[], None]] = None,
+                                     **voice) -> bytes:
+        """Async synthesize_bytes; cancelling it stops the job's polling at once.
+
+        on_miss runs on the event loop, so it must not block.
+        """
+        key = TTSCache.key(text, **voice)
+        if cache is not None:
+            content = await asyncio.to_thread(cache.read, key)
+            if content is not None:
+                print("TTS cache hit")
+                event("tts_cache_hit")
+                return content
+        with self._track_job():
+            job = await self.generate_async(text, **voice)
+            if on_miss is not None:
+                on_miss()
+            mp3_url = await self.wait_for_mp3_async(job)
+            content = await self.download_async(mp3_url)
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, content, text)
+        return content
+
+    async def synthesize_audio_async(self, text: str, volume_factor: float = 4.0,
+                                     cache: Optional["TTSCache"] = None,
+                                     on_miss: Optional[Callable[[], None]] = None,
+                                     **voice) -> AudioSegment:
+        content = await self.synthesize_bytes_async(text, cache=cache, on_miss=on_miss, **voice)
+
+        def _decode():
+            with span("decode"):
+                return apply_gain(decode_mp3(content), volume_factor)
+
+        return await asyncio.to_thread(_decode)
+
+
+def decode_mp3(content: bytes) -> AudioSegment:
+    """Decode MP3 bytes in memory (one ffmpeg pass, no temp file)."""
+    return AudioSegment.from_file(BytesIO(content), format="mp3")
+
+
+def apply_gain(audio: AudioSegment, volume_factor: float, knee: float = 0.8) -> AudioSegment:
+    """Scale audio by volume_factor in the sample domain with a soft limiter.
+
+    Samples below `knee` of full scale are scaled linearly; above it they
+    are compressed smoothly (tanh) towards full scale instead of clipping
+    hard, so a +12 dB boost stays loud without square-wave distortion on
+    peaks.
+    """
+    if volume_factor == 1:
+        return audio
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[audio.sample_width]
+    full_scale = float(np.iinfo(dtype).max)
+    x = np.frombuffer(audio.raw_data, dtype=dtype).astype(np.float32)
+    x *= volume_factor / full_scale
+    mag = np.abs(x)
+    over = mag > knee
+    if over.any():
+        soft = knee + (1.0 - knee) * np.tanh((mag[over] - knee) / (1.0 - knee))
+        x[over] = np.copysign(soft, x[over])
+    out = np.clip(np.round(x * full_scale), -full_scale - 1, full_scale).astype(dtype)
+    return AudioSegment(data=out.tobytes(), sample_width=audio.sample_width,
+                        frame_rate=audio.frame_rate, channels=audio.channels)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a line for cache lookups (unicode + whitespace)."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TTSCache:
+    """Content-addressed, size-capped LRU cache of synthesized MP3s.
+
+    Keys hash the normalized text together with every voice parameter sent
+    to FineShare, so any change produces a new entry. Files are stored
+    exactly as downloaded; gain is applied after decoding, so one entry
+    serves every volume_factor.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(directory, "index.json")
+        self._dirty = False
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self._index_path) as f:
+                self._index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._index = {}
+        # Drop entries whose files were removed out from under us
+        self._index = {k: v for k, v in self._index.items()
+                       if os.path.exists(self._path(k))}
+
+    @staticmethod
+    def key(text: str, **voice) -> str:
+        params = {"voice": DEFAULT_VOICE, "style": "normal", "style_degree": 1,
+                  "rate": 0.0, "pitch": 0.0, "speed": 1}
+        params.update(voice)
+        # Entries are FineShare's MP3 as downloaded; bump when that changes
+        params["format"] = "source-mp3"
+        payload = json.dumps({"text": normalize_text(text), **params},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".mp3")
+
+    def _save_index(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+        self._dirty = False
+
+    def flush(self):
+        """Persist LRU order changed by cache hits since the last write."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached file path for key, or None on a miss."""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or not os.path.exists(self._path(key)):
+                self._index.pop(key, None)
+                self.misses += 1
+                return None
+            # LRU order is only kept in memory here; it reaches disk with the
+            # next put() or flush(), keeping index writes off the hit path
+            entry["last_used"] = time.time()
+            self._dirty = True
+            self.hits += 1
+            return self._path(key)
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Return the cached MP3 bytes for key, or None on a miss."""
+        path = self.get(key)
+        if path is None:
+            return None
         try:
-            # Shape A: { "files": [ { "cover": { "url": "..." } } ] }
-            files = data.get("files")
-            if isinstance(files, list) and files:
-                file_url = files[0].get("cover", {}).get("url")
-        except Exception:
-            pass
-        if not file_url:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:  # evicted by another process in between
+            return None
+
+    def put(self, key: str, content: bytes, text: str = "") -> str:
+        """Store content under key and evict down to the cap."""
+        dest = self._path(key)
+        tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(content)
+        with self._lock:
+            os.replace(tmp, dest)
+            self._index[key] = {
+                "size": len(content),
+                "last_used": time.time(),
+                "text": normalize_text(text)[:200],
+            }
+            self._evict()
+            self._save_index()
+        return dest
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
             try:
-                # Shape B: { "data": { "list": [ { "fileUrl": "..." } ] } }
-                file_url = data.get("data", {}).get(
-                    "list", [{}])[0].get("fileUrl")
-            except Exception:
+                os.remove(self._path(key))
+            except FileNotFoundError:
                 pass
-        if file_url:
-            return file_url
-        print("Waiting for generation...")
-        time.sleep(2)
+            total -= entry["size"]
+            del self._index[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "bytes": sum(e["size"] for e in self._index.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache = None
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_cache() -> TTSCache:
+    """Process-wide cache instance shared by all callers."""
+    global _cache
+    with _client_lock:
+        if _cache is None:
+            _cache = TTSCache()
+            atexit.register(_cache.flush)
+    return _cache
+
+
+def get_client() -> TTSClient:
+    """Process-wide TTSClient backing the module-level helpers."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TTSClient()
+    return _client
+
+
+# Thin module-level wrappers kept for existing callers
+
+def generate_tts(text: str, **voice):
+    return get_client().generate(text, **voice)
+
+
+def wait_for_mp3(job: Optional[dict] = None, timeout: float = 60.0, **schedule) -> str:
+    return get_client().wait_for_mp3(job, timeout=timeout, **schedule)
+
+
+def fetch_latest_mp3(job: Optional[dict] = None, timeout: float = 60.0):
+    """Backwards-compatible wrapper around wait_for_mp3."""
+    print("Waiting for generation...")
+    return wait_for_mp3(job, timeout=timeout)
 
 
 def save_mp3(file_url, filename="output.mp3", volume_factor=4):
-    """Download MP3, increase volume, and save.
+    get_client().save_mp3(file_url, filename, volume_factor)
 
-    volume_factor: linear amplitude multiplier (1.5 = +50%).
-    Requires ffmpeg installed and accessible for pydub.
-    """
-    resp = requests.get(file_url, timeout=60)
-    resp.raise_for_status()
 
-    # Load MP3 from memory, apply gain in dB, and export
-    audio = AudioSegment.from_file(BytesIO(resp.content), format="mp3")
-    gain_db = 20 * math.log10(volume_factor)
-    louder = audio.apply_gain(gain_db)
-    louder.export(filename, format="mp3")
-    print(f"Saved MP3 as {filename} (+{gain_db:.2f} dB)")
+def synthesize_audio(text: str, volume_factor: float = 4.0, use_cache: bool = True,
+                     on_miss: Optional[Callable[[], None]] = None,
+                     **voice) -> AudioSegment:
+    """See TTSClient.synthesize_audio; uses the shared cache unless use_cache=False."""
+    return get_client().synthesize_audio(
+        text, volume_factor=volume_factor,
+        cache=get_cache() if use_cache else None, on_miss=on_miss, **voice)
+
+
+async def synthesize_audio_async(text: str, volume_factor: float = 4.0, use_cache: bool = True,
+                                 on_miss: Optional[Callable[[], None]] = None,
+                                 **voice) -> AudioSegment:
+    """See TTSClient.synthesize_audio_async; uses the shared cache unless use_cache=False."""
+    return await get_client().synthesize_audio_async(
+        text, volume_factor=volume_factor,
+        cache=get_cache() if use_cache else None, on_miss=on_miss, **voice)
+
+
+def prewarm(phrases: Iterable[str], **voice) -> int:
+    """Synthesize any phrases not yet cached. Returns how many were generated."""
+    generated = 0
+
+    def _count():
+        nonlocal generated
+        generated += 1
+
+    for phrase in phrases:
+        phrase = phrase.strip()
+        if phrase:
+            get_client().synthesize_bytes(phrase, cache=get_cache(),
+                                          on_miss=_count, **voice)
+    print(f"TTS cache: {get_cache().stats()}")
+    return generated
 
 
 if __name__ == "__main__":
@@ -114,9 +611,20 @@ if __name__ == "__main__":
     #     save_mp3(mp3_url, f"output.mp3")
     #     index += 1
 
-    print("Requesting TTS generation...")
-    generate_tts(
-        "caleb i want to touch you")
-    print("Fetching latest MP3 URL...")
-    mp3_url = fetch_latest_mp3()
-    save_mp3(mp3_url, f"output.mp3")
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("text", nargs="?", default="caleb i want to touch you")
+    parser.add_argument("--prewarm", metavar="FILE",
+                        help="Cache every line of FILE (one phrase per line)")
+    args = parser.parse_args()
+
+    if args.prewarm:
+        with open(args.prewarm) as f:
+            prewarm(f)
+    else:
+        print("Requesting TTS generation...")
+        job = generate_tts(args.text)
+        print("Fetching MP3 URL...")
+        mp3_url = fetch_latest_mp3(job)
+        save_mp3(mp3_url, f"output.mp3")
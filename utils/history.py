@@ -0,0 +1,141 @@
+"""Token-budgeted chat history with a rolling summary of older turns.
+
+The most recent turns are kept verbatim up to `budget` tokens. When a new
+turn pushes the history over budget, the oldest turns are moved out at
+once, so the next prompt is already back under budget. They are then
+folded into a running summary by a background LLM call, so the
+summarization cost never lands on a turn's critical path. The summary is
+itself capped, which keeps per-turn prompt size flat however long the
+session runs.
+
+Token counts use tiktoken when it is installed and a ~4 chars/token
+estimate otherwise.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")  # gpt-4o family
+except Exception:
+    _ENCODING = None
+
+# Per-message framing tokens in the chat format
+MESSAGE_OVERHEAD = 4
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a spoken conversation between a visitor "
+    "and a robot that talks like President Obama. Merge the new exchanges into "
+    "the existing summary. Keep names, facts the visitor shared, open questions "
+    "and opinions Obama committed to; drop small talk. Write at most {words} "
+    "words of plain prose."
+)
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(text) // 4 + 1
+
+
+def message_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+class ConversationHistory:
+    """Recent turns verbatim within a token budget, older turns summarized.
+
+    client is an OpenAI client used for summaries. Without one (or if a
+    summary call fails) evicted turns are appended to the summary as plain
+    text, trimmed from the front to summary_tokens.
+    """
+
+    def __init__(self, client=None, budget: int = 800, summary_tokens: int = 200,
+                 min_turns: int = 1, model: str = "gpt-4o-mini"):
+        self.client = client
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self.min_turns = min_turns
+        self.model = model
+        self.summary = ""
+        self._turns: List[List[Dict[str, str]]] = []
+        self._lock = threading.Lock()
+        self._summarizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self._pending = None
+
+    def add_turn(self, user_text: str, reply: str = ""):
+        """Record a finished exchange and evict old turns if over budget."""
+        turn = [{"role": "user", "content": user_text}]
+        if reply:
+            turn.append({"role": "assistant", "content": reply})
+        with self._lock:
+            self._turns.append(turn)
+            evicted = []
+            while len(self._turns) > self.min_turns and \
+                    message_tokens([m for t in self._turns for m in t]) > self.budget:
+                evicted.extend(self._turns.pop(0))
+        if evicted:
+            self._pending = self._summarizer.submit(self._fold, evicted)
+
+    def messages(self, current: Optional[str] = None) -> List[Dict[str, str]]:
+        """History to send before the current user message.
+
+        A trailing user message identical to `current` is dropped so the
+        message being answered is never sent twice.
+        """
+        with self._lock:
+            recent = [m for t in self._turns for m in t]
+            summary = self.summary
+        if current is not None and recent and recent[-1]["role"] == "user" \
+                and recent[-1]["content"].strip() == current.strip():
+            recent = recent[:-1]
+        if summary:
+            recent.insert(0, {"role": "system",
+                              "content": "Summary of the conversation so far: " + summary})
+        return recent
+
+    def prompt_tokens(self, current: str = "") -> int:
+        """Estimated tokens of history plus the current message."""
+        return message_tokens(self.messages(current)) + count_tokens(current) + MESSAGE_OVERHEAD
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until any in-flight summary has been merged (tests, shutdown)."""
+        if self._pending is not None:
+            self._pending.result(timeout)
+
+    def _fold(self, evicted: List[Dict[str, str]]):
+        transcript = "\n".join(
+            f"{'Visitor' if m['role'] == 'user' else 'Obama'}: {m['content']}" for m in evicted)
+        with self._lock:
+            previous = self.summary
+        summary = None
+        if self.client is not None:
+            try:
+                resp = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": SUMMARY_PROMPT.format(
+                            words=int(self.summary_tokens * 0.7))},
+                        {"role": "user", "content":
+                            f"Existing summary:\n{previous or '(none)'}\n\nNew exchanges:\n{transcript}"},
+                    ],
+                    temperature=0.2,
+                    max_tokens=self.summary_tokens,
+                )
+                summary = resp.choices[0].message.content.strip()
+            except Exception as e:
+                print(f"History summary failed: {e}")
+        if not summary:
+            summary = _trim_front(f"{previous}\n{transcript}".strip(), self.summary_tokens)
+        with self._lock:
+            self.summary = summary
+
+
+def _trim_front(text: str, max_tokens: int) -> str:
+    """Drop words from the start of text until it fits max_tokens."""
+    words = text.split()
+    while words and count_tokens(" ".join(words)) > max_tokens:
+        words = words[max(1, len(words) // 10):]
+    return " ".join(words)
@@ -4,8 +4,9 @@ import random
 import time
 import os
 import pygame
-from pydub import AudioSegment
 from speak import speak_audio
+from envelope import envelope_for_file
+from pcm_cache import load_clip, warm_library
 
 # Folder with MP3 files
 AUDIO_DIR = "/home/jeffrey-zang/obama/mp3s"
@@ -32,6 +33,8 @@ def play_audio(file):
 
 def main():
     pygame.mixer.init()
+    # Decode the whole library once up front; plays then memory-map PCM
+    warm_library([AUDIO_DIR])
     while True:
         audio_files = get_audio_files()
         if not audio_files:
@@ -42,8 +45,9 @@ def main():
         random.shuffle(audio_files)
         for file in audio_files:
             print(f"Playing: {os.path.basename(file)}")
-            audio = AudioSegment.from_file(file)
-            speak_audio(audio, max_angle=180)
+            audio = load_clip(file)
+            speak_audio(audio, max_angle=180,
+                        envelope=envelope_for_file(file))
             wait_time = random.uniform(MIN_WAIT, MAX_WAIT)
             print(f"Waiting {wait_time:.2f} seconds...")
             time.sleep(wait_time)
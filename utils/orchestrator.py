@@ -0,0 +1,393 @@
+"""asyncio conversation orchestrator: listen -> respond -> synthesize -> play.
+
+Each stage of a turn runs as its own task, and the stages are joined by
+bounded queues:
+
+    respond (streamed sentences) -> chunks -> TTS tasks -> ready -> play
+
+Chunk N+1 is synthesized, downloaded and decoded while chunk N plays. A
+slow stage pushes back on the ones before it instead of letting work
+pile up. Every stage has its own timeout. Cancelling a turn cancels its
+tasks and stops the audio.
+
+Blocking work (microphone, the OpenAI stream, playback) runs on daemon
+threads so that Ctrl+C never waits for it. FineShare jobs are awaited
+on the loop itself, so cancelling a turn also stops polling for them.
+
+The same loop drives the voice conversation (talk_to_obama.py) and the
+text-only say loop (say_loop.py, respond=echo).
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.generate import synthesize_audio_async
+from utils.pipeline import split_for_tts
+from utils.tracing import begin_turn, get_tracer, run_in_context, span
+
+# Seconds per stage; None waits forever. "tts" and "play" apply per chunk.
+# "respond" bounds how long respond() may go without producing a sentence;
+# time spent waiting for playback to drain the chunk queue doesn't count.
+DEFAULT_TIMEOUTS: Dict[str, Optional[float]] = {
+    "listen": None,
+    "respond": 30.0,
+    "tts": 45.0,
+    "play": 120.0,
+}
+
+
+class StageTimeout(TimeoutError):
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"{stage} stage timed out after {timeout:g}s")
+        self.stage = stage
+
+
+class TurnCancelled(Exception):
+    """Raised inside respond() threads when their turn was cancelled."""
+
+
+def run_blocking(fn: Callable, *args, **kwargs) -> asyncio.Future:
+    """Run fn on a daemon thread; the returned future resolves with its result."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _resolve(result, error):
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _run():
+        try:
+            result, error = fn(*args, **kwargs), None
+        except BaseException as e:  # handed to the awaiting task
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(_resolve, result, error)
+        except RuntimeError:  # loop already closed
+            pass
+
+    # The thread inherits this task's context, so tracing sees the turn id
+    run_in_context(_run)
+    return future
+
+
+async def stage(name: str, awaitable, timeout: Optional[float]):
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise StageTimeout(name, timeout) from None
+
+
+def echo(text: str, emit: Callable[[str], None], timings: dict) -> str:
+    """respond() for say-what-I-type mode."""
+    emit(text)
+    return text
+
+
+class Turn:
+    """One exchange: what was heard, what was replied and how much was spoken."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.reply = ""
+        self.chunks: List[str] = []
+        self.heard: List[str] = []  # chunks played to the end, in order
+        self.timings: dict = {}
+        self.started = time.perf_counter()
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        self.interrupted_at: Optional[float] = None  # monotonic, set on barge-in
+        self._playing = None  # (chunk text, monotonic start, duration) while speaking
+
+    @property
+    def interrupted(self) -> bool:
+        return self.interrupted_at is not None
+
+    @property
+    def spoken_text(self) -> str:
+        """What the user actually heard, including part of an interrupted chunk."""
+        words = " ".join(self.heard).split()
+        if self.interrupted and self._playing is not None:
+            chunk, started, duration = self._playing
+            if duration:
+                heard = min(1.0, max(0.0, (self.interrupted_at - started) / duration))
+                partial = chunk.split()
+                words += partial[:int(round(heard * len(partial)))]
+        return " ".join(words)
+
+    @property
+    def spoken(self) -> int:
+        """How many chunks were played to the end."""
+        return len(self.heard)
+
+
+class Orchestrator:
+    """Runs turns until listen() returns None.
+
+    listen()                       -> user text ('' skips, None stops)
+    respond(text, emit, timings)   -> full reply; calls emit(sentence) as
+                                      sentences become available
+    synthesize(text, on_miss)      -> decoded audio for one chunk; runs on
+                                      a thread. Defaults to FineShare via
+                                      synthesize_audio_async on the loop.
+    speak(audio)                   -> plays it (blocking)
+    warm()                         -> optional, run during each turn to
+                                      get the next capture ready
+    on_reply(turn)                 -> called when a turn ends, however it ended
+
+    on_miss runs (on the event loop, so it must not block) when a turn's
+    first chunk is not cached; before_play runs
+    right before a turn's first chunk speaks. With overlap_listen the next
+    listen() starts as soon as a turn begins; the following turn
+    synthesizes immediately but only speaks once the previous one is done.
+    max_ahead bounds how many chunks may be queued or synthesized ahead of
+    playback.
+
+    barge_in (utils.bargein.BargeInDetector) keeps the microphone open
+    during each turn. When the user starts talking, the audio stops at once,
+    the turn and its pending TTS are cancelled (turn.interrupted), and
+    listen is then called as listen(barge_in): the detector, with its
+    microphone still open and holding the speech from just before the
+    trigger on (see BargeInDetector.attach). Without a speech trigger the
+    microphone is closed and listen(None) is called.
+    """
+
+    def __init__(self, listen: Callable[[], Optional[str]],
+                 respond: Callable[..., str] = echo,
+                 speak: Optional[Callable] = None,
+                 synthesize: Optional[Callable] = None,
+                 warm: Optional[Callable[[], None]] = None,
+                 on_reply: Optional[Callable[[Turn], None]] = None,
+                 on_miss: Optional[Callable[[], None]] = None,
+                 before_play: Optional[Callable[[], None]] = None,
+                 stop_audio: Optional[Callable[[], None]] = None,
+                 max_ahead: int = 2, overlap_listen: bool = False,
+                 max_chars: int = 120, volume_factor: float = 4.0,
+                 timeouts: Optional[Dict[str, Optional[float]]] = None,
+                 barge_in=None):
+        if barge_in is not None and overlap_listen:
+            raise ValueError("barge_in needs the microphone between turns; "
+                             "it can't be combined with overlap_listen")
+        if speak is None:
+            from utils.speak import speak_audio as speak
+        self.listen = listen
+        self.respond = respond
+        self.speak = speak
+        self.synthesize = synthesize
+        self.volume_factor = volume_factor
+        self.warm = warm
+        self.on_reply = on_reply
+        self.on_miss = on_miss
+        self.before_play = before_play
+        self._stop_audio = stop_audio
+        self.max_ahead = max_ahead
+        self.overlap_listen = overlap_listen
+        self.max_chars = max_chars
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.barge_in = barge_in
+        self.current: Optional[Turn] = None
+
+    def stop_audio(self):
+        if self._stop_audio is not None:
+            self._stop_audio()
+        else:
+            from utils.audio_out import get_output
+            get_output().cancel()
+
+    async def run(self):
+        previous: Optional[asyncio.Task] = None
+        live = None
+        try:
+            while True:
+                if previous is not None and not self.overlap_listen:
+                    await previous
+                    if self.barge_in is not None:
+                        live = self.barge_in.hand_off()
+                begin_turn()
+                listen = (run_blocking(self.listen, live) if self.barge_in is not None
+                          else run_blocking(self.listen))
+                live = None
+                text = await stage("listen", listen, self.timeouts["listen"])
+                if text is None:
+                    break
+                text = text.strip()
+                if text:
+                    previous = asyncio.create_task(self.turn(text, after=previous))
+                    if self.barge_in is not None:
+                        self._watch(previous)
+            if previous is not None:
+                await previous
+        finally:
+            if previous is not None and not previous.done():
+                previous.cancel()
+                await asyncio.gather(previous, return_exceptions=True)
+            if self.barge_in is not None:
+                self.barge_in.stop()
+
+    def _watch(self, task: asyncio.Task):
+        """Cancel task (a running turn) as soon as the user starts talking."""
+        loop = asyncio.get_running_loop()
+
+        def on_speech():
+            # Audio thread: silence the speaker first, then unwind the turn
+            turn = self.current
+            if turn is None or task.done():
+                return
+            turn.interrupted_at = time.monotonic()
+            self.stop_audio()
+            # Until the last already-rendered block is heard, not until
+            # stop_audio() returns
+            turn.timings["barge_in_stop_ms"] = (
+                self.barge_in.output.quiet_at() - self.barge_in.triggered_at) * 1000
+            print(f"Barge-in: speaker quiet {turn.timings['barge_in_stop_ms']:.0f} ms "
+                  f"after the trigger")
+            loop.call_soon_threadsafe(task.cancel)
+
+        self.barge_in.start(on_speech)
+
+    async def turn(self, text: str, after: Optional[asyncio.Task] = None) -> Turn:
+        turn = Turn(text)
+        self.current = turn
+        cancelled = threading.Event()
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=self.max_ahead)
+        ready: asyncio.Queue = asyncio.Queue(maxsize=self.max_ahead)
+        tasks = [
+            asyncio.create_task(self._respond(turn, chunks, cancelled)),
+            asyncio.create_task(self._synthesize_all(turn, chunks, ready)),
+            asyncio.create_task(self._play_all(turn, ready, after)),
+        ]
+        if self.warm is not None:
+            run_blocking(self.warm)
+        aborted = False
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            turn.cancelled = aborted = True
+            if not turn.interrupted:
+                raise
+        except Exception as e:
+            aborted = True
+            turn.error = e
+            print(f"Error: {e}")
+        finally:
+            cancelled.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if aborted:
+                self.stop_audio()
+            if self.on_reply is not None:
+                self.on_reply(turn)
+            get_tracer().flush()
+        return turn
+
+    async def _respond(self, turn: Turn, chunks: asyncio.Queue,
+                       cancelled: threading.Event):
+        loop = asyncio.get_running_loop()
+        timeout = self.timeouts["respond"]
+        last_progress = time.monotonic()
+        blocked = False  # respond thread is waiting on a full chunk queue
+
+        def emit(sentence: str):
+            # Called on the respond thread; blocks while the queue is full
+            nonlocal last_progress, blocked
+            blocked = True
+            try:
+                for chunk in split_for_tts(sentence, max_chars=self.max_chars):
+                    put = asyncio.run_coroutine_threadsafe(chunks.put(chunk), loop)
+                    while True:
+                        if cancelled.is_set():
+                            put.cancel()
+                            raise TurnCancelled()
+                        try:
+                            put.result(timeout=0.1)
+                            break
+                        except concurrent.futures.TimeoutError:
+                            continue
+            finally:
+                blocked = False
+                last_progress = time.monotonic()
+
+        reply = run_blocking(self.respond, turn.text, emit, turn.timings)
+        try:
+            while True:
+                wait = None
+                if timeout is not None:
+                    idle = time.monotonic() - last_progress
+                    if not blocked and idle >= timeout:
+                        raise StageTimeout("respond", timeout)
+                    # While blocked, check back soon after playback frees a slot
+                    wait = min(timeout, 0.5) if blocked else timeout - idle
+                done, _ = await asyncio.wait({reply}, timeout=wait)
+                if done:
+                    turn.reply = reply.result()
+                    break
+        finally:
+            cancelled.set()  # a timed-out respond thread stops at its next emit
+        await chunks.put(None)
+
+    async def _synthesize_all(self, turn: Turn, chunks: asyncio.Queue,
+                              ready: asyncio.Queue):
+        pending: List[asyncio.Task] = []
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    await ready.put(None)
+                    return
+                on_miss = self.on_miss if not turn.chunks else None
+                turn.chunks.append(chunk)
+                task = asyncio.create_task(stage(
+                    "tts", self._synthesize(chunk, on_miss), self.timeouts["tts"]))
+                pending.append(task)
+                await ready.put((chunk, task))
+        except BaseException:
+            # Turn aborted: drop synthesis that will never be played
+            for task in pending:
+                task.cancel()
+            raise
+
+    async def _synthesize(self, chunk: str, on_miss: Optional[Callable[[], None]]):
+        if self.synthesize is not None:
+            return await run_blocking(self.synthesize, chunk, on_miss)
+        return await synthesize_audio_async(chunk, volume_factor=self.volume_factor,
+                                            on_miss=on_miss)
+
+    async def _play_all(self, turn: Turn, ready: asyncio.Queue,
+                        after: Optional[asyncio.Task]):
+        first = True
+        while True:
+            item = await ready.get()
+            if item is None:
+                return
+            chunk, task = item
+            try:
+                audio = await task
+            except Exception as e:
+                # Keep going with the remaining chunks; reported on the turn
+                print(f"TTS chunk failed: {e}")
+                turn.error = turn.error or e
+                continue
+            if first:
+                first = False
+                if after is not None:
+                    await asyncio.wait({after})
+                if self.before_play is not None:
+                    await run_blocking(self.before_play)
+                turn.timings["first_speech"] = time.perf_counter()
+            if turn.interrupted:
+                return
+            duration = len(audio) / 1000.0 if hasattr(audio, "frame_rate") else None
+            turn._playing = (chunk, time.monotonic(), duration)
+            with span("play", chunk=turn.spoken):
+                await stage("play", run_blocking(self.speak, audio), self.timeouts["play"])
+            if turn.interrupted:
+                # speak() returned because the audio was cut off
+                return
+            turn._playing = None
+            turn.heard.append(chunk)
@@ -0,0 +1,157 @@
+"""Decoded-PCM cache for the clip library (mp3s/ and friends).
+
+Decoding an MP3 with ffmpeg costs hundreds of milliseconds on the Pi, on
+every play. Here each clip is decoded once into a raw PCM file plus a small
+JSON header; later plays memory-map the PCM instead. Entries are invalidated
+when the source file's mtime or size changes.
+
+    python utils/pcm_cache.py mp3s mp3s/placeholder   # bulk-decode at startup
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from pydub import AudioSegment
+
+try:
+    from utils.envelope import envelope_for_file
+except ImportError:  # run as a script from inside utils/
+    from envelope import envelope_for_file
+
+CACHE_DIR = os.getenv(
+    "OBAMA_PCM_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), ".pcm_cache"),
+)
+
+# pydub sample widths -> numpy dtypes (pydub's 8-bit audio is signed)
+_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def _entry_paths(path: str) -> Tuple[str, str]:
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return (os.path.join(CACHE_DIR, key + ".pcm"),
+            os.path.join(CACHE_DIR, key + ".json"))
+
+
+def _source_stat(path: str) -> dict:
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _read_meta(path: str):
+    """Cached header for path if it is still valid, else None."""
+    pcm_path, meta_path = _entry_paths(path)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if {k: meta.get(k) for k in ("mtime_ns", "size")} != _source_stat(path) \
+            or not os.path.exists(pcm_path):
+        return None
+    return meta
+
+
+def decode(path: str) -> dict:
+    """Decode path into the cache (unconditionally); returns its header."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    pcm_path, meta_path = _entry_paths(path)
+    stat = _source_stat(path)
+    audio = AudioSegment.from_file(path)
+    tmp = pcm_path + f".{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(audio.raw_data)
+    os.replace(tmp, pcm_path)
+    meta = {
+        "source": os.path.abspath(path),
+        **stat,
+        "frame_rate": audio.frame_rate,
+        "channels": audio.channels,
+        "sample_width": audio.sample_width,
+    }
+    tmp = meta_path + f".{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+    return meta
+
+
+def load_pcm(path: str) -> Tuple[np.ndarray, dict]:
+    """Memory-mapped samples for path, shape (frames, channels), plus header.
+
+    Decodes on the first call (or after the source changed).
+    """
+    meta = _read_meta(path) or decode(path)
+    pcm_path, _ = _entry_paths(path)
+    dtype = _DTYPES[meta["sample_width"]]
+    if os.path.getsize(pcm_path) == 0:
+        samples = np.zeros(0, dtype=dtype)
+    else:
+        samples = np.memmap(pcm_path, dtype=dtype, mode="r")
+    return samples.reshape(-1, meta["channels"]), meta
+
+
+def load_clip(path: str) -> AudioSegment:
+    """AudioSegment for path backed by the cache instead of an ffmpeg decode."""
+    samples, meta = load_pcm(path)
+    return AudioSegment(
+        data=samples.tobytes(),
+        sample_width=meta["sample_width"],
+        frame_rate=meta["frame_rate"],
+        channels=meta["channels"],
+    )
+
+
+def load_mono(path: str) -> Tuple[np.ndarray, int]:
+    """Mono float samples (native integer scale) and sample rate for path."""
+    samples, meta = load_pcm(path)
+    if meta["channels"] == 1:
+        return samples[:, 0], meta["frame_rate"]
+    return samples.mean(axis=1), meta["frame_rate"]
+
+
+def library_files(directories: Iterable[str]) -> List[str]:
+    files = []
+    for directory in directories:
+        files.extend(
+            os.path.join(directory, f) for f in sorted(os.listdir(directory))
+            if f.lower().endswith((".mp3", ".wav", ".ogg", ".m4a")))
+    return files
+
+
+def warm_library(directories: Iterable[str], workers: int = 4,
+                 envelopes: bool = True) -> int:
+    """Bulk-decode every stale clip in directories on a worker pool.
+
+    ffmpeg runs as a subprocess, so threads decode in parallel. With
+    envelopes=True the mouth-envelope sidecars are filled in too. Returns
+    how many clips had to be decoded.
+    """
+    files = library_files(directories)
+    stale = [f for f in files if _read_meta(f) is None]
+
+    def _warm(path):
+        if _read_meta(path) is None:
+            decode(path)
+        if envelopes:
+            envelope_for_file(path)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_warm, files))
+    print(f"PCM cache: {len(stale)} decoded, {len(files) - len(stale)} already cached")
+    return len(stale)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dirs", nargs="*", default=["mp3s", "mp3s/placeholder"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args()
+    warm_library(args.dirs, workers=args.workers)
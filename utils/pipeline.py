@@ -0,0 +1,171 @@
+"""Chunked Obama TTS: synthesize sentences in parallel, speak them in order.
+
+A reply is split at sentence (and, for long sentences, clause) boundaries.
+Each chunk is synthesized on a small worker pool while a player thread
+speaks finished chunks strictly in order, so the first chunk starts playing
+while the rest are still being generated.
+"""
+
+import re
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from pydub import AudioSegment
+
+from utils.generate import synthesize_audio
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:—–])\s+")
+
+
+def split_for_tts(text: str, max_chars: int = 120, min_chars: int = 12) -> List[str]:
+    """Split text into speakable chunks.
+
+    Sentences longer than max_chars are further split at clause punctuation.
+    Fragments shorter than min_chars are merged into a neighbour so the
+    voice doesn't get choppy on things like "Folks," or "Look.".
+    """
+    pieces: List[str] = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        current = ""
+        for clause in _CLAUSE_END.split(sentence):
+            if current and len(current) + len(clause) + 1 > max_chars:
+                pieces.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}".strip()
+        if current:
+            pieces.append(current)
+
+    chunks: List[str] = []
+    for piece in pieces:
+        if chunks and (len(chunks[-1]) < min_chars or len(piece) < min_chars) \
+                and len(chunks[-1]) + len(piece) + 1 <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+class SentenceBuffer:
+    """Accumulates streamed text and releases it a complete sentence at a time."""
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def push(self, delta: str) -> List[str]:
+        """Add streamed text; returns any sentences that are now complete."""
+        self._buf += delta
+        end = None
+        for m in _SENTENCE_END.finditer(self._buf):
+            end = m.end()
+        if end is None or len(self._buf[:end].strip()) < self.min_chars:
+            return []
+        done, self._buf = self._buf[:end].strip(), self._buf[end:]
+        return [done]
+
+    def flush(self) -> List[str]:
+        """Whatever is left once the stream has ended."""
+        rest, self._buf = self._buf.strip(), ""
+        return [rest] if rest else []
+
+
+def stream_sentences(text: str, min_chars: int = 12) -> List[str]:
+    """The sentences SentenceBuffer releases when text streams in word by word.
+
+    A stored reply replayed through this is chunked exactly as it was when
+    the LLM streamed it, so its audio comes from the TTS cache.
+    """
+    buffer = SentenceBuffer(min_chars)
+    sentences: List[str] = []
+    for piece in re.findall(r"\s*\S+", text):
+        sentences += buffer.push(piece)
+    return sentences + buffer.flush()
+
+
+class SpeechPipeline:
+    """Synthesize chunks concurrently (bounded pool) and speak them in order.
+
+    feed() may be called repeatedly as text becomes available; close() marks
+    the end of the reply and wait() blocks until the last chunk has played.
+
+    on_miss runs once, when the first chunk has to be synthesized (not
+    cached); before_play runs once, right before the first chunk speaks.
+    """
+
+    def __init__(self, speak: Optional[Callable[[AudioSegment], None]] = None,
+                 max_workers: int = 3, volume_factor: float = 4.0,
+                 on_miss: Optional[Callable[[], None]] = None,
+                 before_play: Optional[Callable[[], None]] = None,
+                 max_chars: int = 120):
+        if speak is None:
+            from utils.speak import speak_audio as speak
+        self.speak = speak
+        self.volume_factor = volume_factor
+        self.max_chars = max_chars
+        self.on_miss = on_miss
+        self.before_play = before_play
+        self.chunks: List[str] = []
+        self.error: Optional[BaseException] = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="tts")
+        self._pending: "queue.Queue[Optional[Future]]" = queue.Queue()
+        self._player = threading.Thread(target=self._play_loop, daemon=True)
+        self._player.start()
+
+    def _synthesize(self, index: int, text: str) -> AudioSegment:
+        on_miss = self.on_miss if index == 0 else None
+        return synthesize_audio(text, volume_factor=self.volume_factor,
+                                on_miss=on_miss)
+
+    def feed(self, text: str):
+        """Queue text for synthesis, split into chunks."""
+        for chunk in split_for_tts(text, max_chars=self.max_chars):
+            index = len(self.chunks)
+            self.chunks.append(chunk)
+            self._pending.put(self._pool.submit(self._synthesize, index, chunk))
+
+    def close(self):
+        """No more text is coming."""
+        self._pending.put(None)
+
+    def wait(self):
+        """Block until every queued chunk has been spoken."""
+        self._player.join()
+        self._pool.shutdown(wait=False)
+        if self.error is not None:
+            raise self.error
+
+    def _play_loop(self):
+        first = True
+        while True:
+            fut = self._pending.get()
+            if fut is None:
+                return
+            try:
+                audio = fut.result()
+            except Exception as e:
+                # Keep going with the remaining chunks; report at wait()
+                print(f"TTS chunk failed: {e}")
+                self.error = self.error or e
+                continue
+            try:
+                if first:
+                    first = False
+                    if self.before_play is not None:
+                        self.before_play()
+                self.speak(audio)
+            except Exception as e:
+                # e.g. the audio device went away; later chunks may still play
+                print(f"Playback failed: {e}")
+                self.error = self.error or e
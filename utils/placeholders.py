@@ -0,0 +1,77 @@
+"""Resident pool of filler clips ("uhh", "let me be clear") for TTS waits.
+
+Every clip in the placeholder directory is decoded once (through the PCM
+cache) at startup and kept in memory with its duration and mouth envelope,
+so starting a filler costs nothing at the moment it is needed.
+"""
+
+import os
+import random
+import threading
+from typing import Callable, List, Optional
+
+from pydub import AudioSegment
+
+from utils.envelope import envelope_for_file
+from utils.pcm_cache import library_files, load_clip
+from utils.tracing import event
+
+
+class Placeholder:
+    def __init__(self, path: str, audio: AudioSegment, envelope):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.audio = audio
+        self.envelope = envelope
+        self.duration = len(audio) / 1000.0
+
+
+class PlaceholderPool:
+    """Filler clips picked to cover the expected synthesis wait."""
+
+    def __init__(self, directory: str = "mp3s/placeholder"):
+        self.directory = directory
+        self.clips: List[Placeholder] = []
+        self._last: Optional[Placeholder] = None
+        if os.path.isdir(directory):
+            for path in library_files([directory]):
+                # Mono up front so speak_audio doesn't re-mix on every play
+                audio = load_clip(path).set_channels(1)
+                self.clips.append(Placeholder(path, audio, envelope_for_file(path)))
+        print(f"Loaded {len(self.clips)} placeholder clips from {directory}")
+
+    def choose(self, expected_wait: float) -> Optional[Placeholder]:
+        """Pick a filler for a wait of about expected_wait seconds.
+
+        Prefers clips that end before the real audio is likely ready (so it
+        isn't held back) but picks the longest available when the queue is
+        deep, and avoids repeating the previous choice.
+        """
+        if not self.clips:
+            return None
+        candidates = [c for c in self.clips if c is not self._last] or self.clips
+        fitting = [c for c in candidates if c.duration <= expected_wait]
+        if fitting:
+            longest = max(c.duration for c in fitting)
+            # Anything within half a second of the best fit is fair game
+            pool = [c for c in fitting if c.duration >= longest - 0.5]
+        else:
+            shortest = min(c.duration for c in candidates)
+            pool = [c for c in candidates if c.duration <= shortest + 0.5]
+        self._last = random.choice(pool)
+        return self._last
+
+    def play(self, expected_wait: float,
+             speak: Callable[..., None]) -> Optional[threading.Thread]:
+        """Start a filler right away in the background; returns its thread."""
+        clip = self.choose(expected_wait)
+        if clip is None:
+            return None
+        thread = threading.Thread(
+            target=speak, args=(clip.audio,),
+            kwargs={"envelope": clip.envelope, "kind": "filler"}, daemon=True)
+        thread.start()
+        event("placeholder_start", clip=clip.name, expected_wait=round(expected_wait, 2))
+        print(f"Playing placeholder {clip.name} ({clip.duration:.1f}s, "
+              f"expected wait {expected_wait:.1f}s)")
+        return thread
@@ -0,0 +1,164 @@
+"""Local cache of Obama's replies to the questions visitors keep asking.
+
+Transcripts are normalized and matched against previously answered
+questions with character n-gram TF-IDF cosine similarity. This is robust
+to the small wording and transcription differences between "what's your
+favorite food" and "what is your favourite food?", and it needs nothing
+but the standard library. A confident match returns one of that
+question's stored replies without an LLM round trip. Callers replay a
+hit through utils.pipeline.stream_sentences, which chunks it exactly as
+the streamed original was, so its audio comes from the TTS cache too.
+
+Each question keeps a small pool of replies, picked at random, with a
+per-reply TTL. While a pool isn't full, a hit still goes to the LLM
+some of the time to add variety.
+
+    OBAMA_REPLY_CACHE_THRESHOLD   minimum cosine similarity (default 0.75)
+    OBAMA_REPLY_CACHE_TTL_HOURS   reply lifetime (default 24)
+"""
+
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), ".reply_cache.json")
+
+_FILLERS = re.compile(r"\b(um+|uh+|hmm+|hey|obama|mr president|please)\b")
+
+
+def normalize_question(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = text.replace("what's", "what is").replace("'re", " are").replace("'s", " is")
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    text = _FILLERS.sub(" ", text)
+    return " ".join(text.split())
+
+
+def char_ngrams(text: str, n: int = 3) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+class ReplyCache:
+    """Fuzzy question -> reply pool cache, persisted as JSON."""
+
+    def __init__(self, path: str = CACHE_PATH, threshold: Optional[float] = None,
+                 ttl: Optional[float] = None, pool_size: int = 3,
+                 refresh_prob: float = 0.3, min_chars: int = 8):
+        self.path = path
+        self.threshold = threshold if threshold is not None else \
+            float(os.getenv("OBAMA_REPLY_CACHE_THRESHOLD") or "0.75")
+        self.ttl = ttl if ttl is not None else \
+            float(os.getenv("OBAMA_REPLY_CACHE_TTL_HOURS") or "24") * 3600
+        self.pool_size = pool_size
+        self.refresh_prob = refresh_prob
+        self.min_chars = min_chars
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self._entries: List[dict] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._entries = []
+        self._vectors: Optional[List[Dict[str, float]]] = None
+
+    # --- similarity index ---
+
+    def _idf(self) -> Dict[str, float]:
+        df = Counter()
+        for entry in self._entries:
+            df.update(set(char_ngrams(entry["question"])))
+        n = len(self._entries)
+        return {gram: math.log((1 + n) / (1 + count)) + 1 for gram, count in df.items()}
+
+    def _vector(self, text: str, idf: Dict[str, float]) -> Dict[str, float]:
+        default = math.log(1 + len(self._entries)) + 1  # unseen gram
+        vec = {g: c * idf.get(g, default) for g, c in char_ngrams(text).items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {g: v / norm for g, v in vec.items()}
+
+    def _index(self):
+        if self._vectors is None:
+            self._idf_cache = self._idf()
+            self._vectors = [self._vector(e["question"], self._idf_cache)
+                             for e in self._entries]
+        return self._vectors, self._idf_cache
+
+    def best_match(self, text: str) -> Tuple[Optional[dict], float]:
+        """(entry, cosine similarity) of the closest stored question."""
+        question = normalize_question(text)
+        if not question or not self._entries:
+            return None, 0.0
+        vectors, idf = self._index()
+        query = self._vector(question, idf)
+        best, best_sim = None, 0.0
+        for entry, vec in zip(self._entries, vectors):
+            sim = sum(w * vec.get(g, 0.0) for g, w in query.items())
+            if sim > best_sim:
+                best, best_sim = entry, sim
+        return best, best_sim
+
+    # --- cache API ---
+
+    def _expire(self, entry: dict, now: float):
+        entry["replies"] = [r for r in entry["replies"] if now - r["created"] < self.ttl]
+
+    def lookup(self, text: str) -> Optional[str]:
+        """A stored reply for a confidently matching question, else None."""
+        if len(normalize_question(text)) < self.min_chars:
+            return None
+        with self._lock:
+            entry, sim = self.best_match(text)
+            if entry is not None and sim >= self.threshold:
+                self._expire(entry, time.time())
+                replies = entry["replies"]
+                # A partly filled pool still asks the LLM now and then
+                if replies and (len(replies) >= self.pool_size
+                                or random.random() >= self.refresh_prob):
+                    self.hits += 1
+                    print(f"Reply cache hit ({sim:.2f}): {entry['question']!r}")
+                    return random.choice(replies)["text"]
+            self.misses += 1
+            return None
+
+    def add(self, text: str, reply: str):
+        """Store reply under text's question (merging into a close match)."""
+        question = normalize_question(text)
+        reply = reply.strip()
+        if len(question) < self.min_chars or not reply:
+            return
+        now = time.time()
+        with self._lock:
+            entry, sim = self.best_match(text)
+            if entry is None or sim < self.threshold:
+                entry = {"question": question, "replies": []}
+                self._entries.append(entry)
+                self._vectors = None
+            self._expire(entry, now)
+            if all(r["text"] != reply for r in entry["replies"]):
+                entry["replies"].append({"text": reply, "created": now})
+                entry["replies"] = entry["replies"][-self.pool_size:]
+            self._entries = [e for e in self._entries if e["replies"]]
+            self._vectors = None
+            self._save()
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "questions": len(self._entries),
+                    "replies": sum(len(e["replies"]) for e in self._entries)}
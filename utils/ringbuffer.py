@@ -0,0 +1,73 @@
+"""Fixed-capacity float32 ring buffer for microphone capture."""
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Single-producer ring buffer with zero-copy reads of recent audio.
+
+    Storage is mirrored (every sample is written at i and i + capacity), so
+    any span of up to `capacity` most recent samples is one contiguous slice
+    and can be returned as a view without copying.
+
+    Writes come from one thread (the sounddevice callback) and publish the
+    new write position with a single attribute store, so readers never need
+    a lock. Views alias the storage: a reader that holds one for longer
+    than it takes to record `capacity - len(view)` more samples may see it
+    overwritten, so size capacity with headroom or copy what you keep.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = np.zeros(2 * capacity, dtype=np.float32)
+        self._written = 0  # total samples ever written (absolute position)
+
+    @property
+    def written(self) -> int:
+        """Absolute position one past the newest sample."""
+        return self._written
+
+    @property
+    def oldest(self) -> int:
+        """Absolute position of the oldest sample still held."""
+        return max(0, self._written - self.capacity)
+
+    def write(self, samples: np.ndarray):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        n = samples.shape[0]
+        if n == 0:
+            return
+        cap = self.capacity
+        pos = self._written
+        if n > cap:
+            # Only the newest `capacity` samples can be kept anyway
+            pos += n - cap
+            samples = samples[-cap:]
+            n = cap
+        start = pos % cap
+        first = min(n, cap - start)
+        for base in (0, cap):
+            self._buf[base + start:base + start + first] = samples[:first]
+            if first < n:
+                self._buf[base:base + n - first] = samples[first:]
+        self._written = pos + n
+
+    def latest(self, n: int) -> np.ndarray:
+        """View of the most recent n samples (fewer if not yet recorded)."""
+        written = self._written
+        n = max(0, min(n, self.capacity, written))
+        end = written % self.capacity + self.capacity
+        return self._buf[end - n:end]
+
+    def since(self, position: int) -> np.ndarray:
+        """View of everything from absolute `position` up to now.
+
+        Positions older than the buffer holds are clamped to the oldest
+        retained sample.
+        """
+        return self.latest(self._written - position)
+
+    def clear(self):
+        self._written = 0
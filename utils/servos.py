@@ -0,0 +1,128 @@
+"""Servo output layer between the animation loop and gpiozero.
+
+The animation loop asks for an angle on every 10 ms tick, but a hobby servo
+only reads a new pulse width every 20 ms and can't resolve a fraction of a
+degree. Each pigpio write is also a socket round trip on the Pi. So every
+channel here drops changes smaller than its deadband and caps its own
+write rate. A bank stages all requests made during a tick and writes
+them together in commit().
+
+Debug output is sampled (at most one line per OBAMA_SERVO_DEBUG seconds,
+off when unset) instead of printed on every tick.
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+
+class DebugSampler:
+    """Print at most one line per `period` seconds; period <= 0 disables it."""
+
+    def __init__(self, period: float = 0.0):
+        self.period = period
+        self._last = 0.0
+
+    def emit(self, message, now: Optional[float] = None):
+        """message may be a string or a callable, so disabled output costs nothing."""
+        if self.period <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        if now - self._last >= self.period:
+            self._last = now
+            print(message() if callable(message) else message)
+
+
+class ServoChannel:
+    """One servo: deadband, rate cap and write counters.
+
+    `angle` is the most recently requested position (what the animation
+    wants); `written` is what was last sent to the hardware. `suppressed`
+    counts changes dropped by the deadband; `deferred` counts ticks a
+    change was held back by the rate cap (it is still written later).
+    """
+
+    def __init__(self, servo, name: str, deadband: float = 1.0, max_rate: float = 50.0,
+                 min_angle: float = 0, max_angle: float = 180,
+                 initial: Optional[float] = None):
+        self.servo = servo
+        self.name = name
+        self.deadband = deadband
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.min_angle = min_angle
+        self.max_angle = max_angle
+        self.angle = initial
+        self.written = initial
+        self.issued = 0
+        self.suppressed = 0
+        self.deferred = 0
+        self._last_write = float("-inf")
+        self._pending = False
+        self._force = False
+
+    def request(self, angle: float, force: bool = False):
+        self.angle = max(self.min_angle, min(self.max_angle, angle))
+        self._pending = True
+        self._force = self._force or force
+
+    def flush(self, now: float) -> bool:
+        """Write the requested angle if it is due; returns whether it was written.
+
+        Sub-deadband changes are dropped; changes that arrive too soon after
+        the last write stay pending and go out on a later tick.
+        """
+        if not self._pending:
+            return False
+        if self.angle == self.written:
+            self._pending = self._force = False
+            return False
+        if not self._force:
+            if self.written is not None and abs(self.angle - self.written) < self.deadband:
+                self.suppressed += 1
+                self._pending = False
+                return False
+            if now - self._last_write < self.min_interval:
+                self.deferred += 1
+                return False
+        self.servo.angle = self.angle
+        self.written = self.angle
+        self._last_write = now
+        self._pending = self._force = False
+        self.issued += 1
+        return True
+
+
+class ServoBank:
+    """Named channels written together once per animation tick."""
+
+    def __init__(self, channels: Dict[str, ServoChannel], debug: Optional[DebugSampler] = None):
+        self.channels = channels
+        self.debug = debug or DebugSampler(float(os.getenv("OBAMA_SERVO_DEBUG", "0") or 0))
+
+    def __getitem__(self, name: str) -> ServoChannel:
+        return self.channels[name]
+
+    def set(self, force: bool = False, **angles: float):
+        """Stage angles by channel name; nothing is written until commit()."""
+        for name, angle in angles.items():
+            self.channels[name].request(angle, force)
+
+    def commit(self, now: Optional[float] = None) -> int:
+        """Write every due channel; returns how many writes were issued."""
+        now = time.monotonic() if now is None else now
+        issued = sum(channel.flush(now) for channel in self.channels.values())
+        self.debug.emit(lambda: "Servos " + " ".join(
+            f"{c.name}={c.written:.1f}°" for c in self.channels.values()
+            if c.written is not None) + f" ({self.totals()})", now)
+        return issued
+
+    def totals(self) -> dict:
+        return {
+            "issued": sum(c.issued for c in self.channels.values()),
+            "suppressed": sum(c.suppressed for c in self.channels.values()),
+            "deferred": sum(c.deferred for c in self.channels.values()),
+        }
+
+    def stats(self) -> dict:
+        return {name: {"issued": c.issued, "suppressed": c.suppressed, "deferred": c.deferred}
+                for name, c in self.channels.items()}
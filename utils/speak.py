@@ -1,11 +1,21 @@
 from pydub import AudioSegment
-from pydub.playback import play
 import numpy as np
-import threading
+import os
 import time
 from time import sleep
 import random
 
+try:
+    from utils.audio_out import get_output
+    from utils.envelope import envelope_for_segment, frame_hop
+    from utils.servos import ServoBank, ServoChannel
+    from utils.tracing import event
+except ImportError:  # run as a script from inside utils/
+    from audio_out import get_output
+    from envelope import envelope_for_segment, frame_hop
+    from servos import ServoBank, ServoChannel
+    from tracing import event
+
 # Optional Raspberry Pi hardware support
 try:
     import gpiozero
@@ -52,27 +62,104 @@ except Exception:
 
 servoStart = 95
 mouthServo.angle = servoStart
-def rotate(degrees):
-    print(f"Servo -> {degrees:.1f}°")
-    mouthServo.angle = max(0, min(180, servoStart - degrees))
 
+# All animation writes go through the bank: deadband, 50 Hz cap per servo
+# (the PWM frame rate) and one batched write per tick
+servos = ServoBank({
+    "mouth": ServoChannel(mouthServo, "mouth", initial=servoStart),
+    "arm1": ServoChannel(armServo1, "arm1", initial=0),
+    "arm2": ServoChannel(armServo2, "arm2", initial=180),
+})
 
-def animate_servo_with_audio(audio, update_interval=0.01, max_angle=30):
-    samples = np.array(audio.get_array_of_samples()).astype(np.float32)
-    samples /= np.max(np.abs(samples))  # normalize
 
-    sample_rate = audio.frame_rate
-    duration_per_sample = 1.0 / sample_rate
-    step = int(update_interval / duration_per_sample)
+def rotate(degrees, commit=True):
+    servos.set(mouth=servoStart - degrees)
+    if commit:
+        servos.commit()
 
-    time.sleep(1.18)
-    start_time = time.time()
 
+def servo_lookahead() -> float:
+    """Servo response time (s): frames are commanded this far ahead of the audio.
+
+    Read per clip, so a value from .env loaded after import still applies.
+    """
+    return float(os.getenv("OBAMA_SERVO_LOOKAHEAD_MS") or "40") / 1000.0
+
+
+def sync_summary(errors, skipped=0) -> dict:
+    """Per-clip lip-sync stats (ms) from signed command-time errors in seconds."""
+    err = np.abs(np.asarray(errors, dtype=np.float64)) * 1000
+    if err.size == 0:
+        return {"frames": 0, "skipped": skipped}
+    return {
+        "frames": int(err.size),
+        "skipped": skipped,
+        "mean_ms": float(err.mean()),
+        "p95_ms": float(np.percentile(err, 95)),
+        "max_ms": float(err.max()),
+    }
+
+
+def animate_servo_with_audio(audio, update_interval=0.01, max_angle=30, envelope=None,
+                             playback=None, lookahead=None, kind="reply"):
+    """Drive the mouth from a loudness envelope and wiggle the arms.
+
+    envelope: precomputed per-frame loudness in [0, 1] (see utils.envelope);
+    computed here in one vectorized pass if not given. The loop itself only
+    does table lookups.
+
+    playback: the clip's handle on the output stream (utils.audio_out).
+    Each tick reads how much of the clip has actually been heard and shows
+    the envelope frame `lookahead` seconds ahead of it (servo travel time),
+    so machine load or a slow audio backend skips frames instead of
+    drifting. Without a handle the clip is assumed to start now.
+
+    kind tags the clip's audio_start trace event ("reply", or "filler" for
+    placeholder clips) so filler isn't mistaken for the reply starting.
+
+    Returns sync stats (how far each command landed from its frame's time)
+    and how many servo writes were issued, suppressed (deadband) and
+    deferred (rate cap).
+    """
+    sample_rate = audio.frame_rate
+    if envelope is None:
+        envelope = envelope_for_segment(audio, update_interval)
+    frame_sec = frame_hop(sample_rate, update_interval) / sample_rate
+    angles = (np.asarray(envelope, dtype=np.float32) * max_angle).tolist()
+    lookahead = servo_lookahead() if lookahead is None else lookahead
+
+    if playback is not None:
+        clock = playback.position
+    else:
+        t0 = time.monotonic()
+        clock = lambda: time.monotonic() - t0
+
+    before = servos.totals()
+    start_time = time.time()
     arm1cd = start_time + random.uniform(2, 5)
     arm2cd = start_time + random.uniform(2, 5)
     arm1Target = random.uniform(0, 90)
     arm2Target = random.uniform(0, 90)
-    for i in range(0, len(samples), step):
+    errors = []
+    last_idx = -1
+    skipped = 0
+    heard = False
+    while playback is None or not playback.cancelled:
+        now = clock()
+        if not heard and now >= 0:
+            heard = True
+            event("audio_start", kind=kind, late_ms=round(now * 1000, 1))
+        target = now + lookahead
+        idx = int(target // frame_sec)
+        if idx >= len(angles):
+            break
+        if idx < 0 or idx == last_idx:
+            # Not started yet / already showing this frame: sleep to the next one
+            time.sleep(min((max(idx, last_idx) + 1) * frame_sec - target, 0.05))
+            continue
+        skipped += max(0, idx - last_idx - 1)
+        last_idx = idx
+
         if time.time() - arm1cd > 0:
             arm1Target = random.uniform(0, 90)
             arm1cd += random.uniform(2, 5)
@@ -81,43 +168,43 @@ def animate_servo_with_audio(audio, update_interval=0.01, max_angle=30):
             arm2cd += random.uniform(2, 5)
 
         speed = 1
-        if arm1Target != armServo1.angle:
-            armServo1.angle += max(-speed, min(speed, arm1Target - armServo1.angle))
-        if arm2Target != armServo2.angle:
-            armServo2.angle += max(-speed, min(speed, arm2Target - armServo2.angle))
-        
-
-        chunk = samples[i:i+step]
-        if len(chunk) == 0:
-            break
-
-        rms = np.sqrt(np.mean(chunk**2))
-        angle = rms * max_angle  # map to 0–30 degrees
-
-        rotate(angle)
-
-        # Sync with playback
-        expected_time = start_time + (i / sample_rate)
-        now = time.time()
-        delay = expected_time - now
+        arm1, arm2 = servos["arm1"].angle, servos["arm2"].angle
+        servos.set(arm1=arm1 + max(-speed, min(speed, arm1Target - arm1)),
+                   arm2=arm2 + max(-speed, min(speed, arm2Target - arm2)))
+        rotate(angles[idx], commit=False)
+        servos.commit()
+        # Where the audio really was when this frame was commanded
+        errors.append(clock() + lookahead - idx * frame_sec)
+
+        delay = (idx + 1) * frame_sec - (clock() + lookahead)
         if delay > 0:
             time.sleep(delay)
 
-    # small buffer so playback can finish naturally
-    armServo1.angle = 0
-    armServo2.angle = 180
-    time.sleep(0.25)
+    servos.set(force=True, arm1=0, arm2=180)
+    servos.commit()
+    event("servo_done", frames=len(errors))
+    summary = sync_summary(errors, skipped)
+    after = servos.totals()
+    summary["servo_issued"] = after["issued"] - before["issued"]
+    summary["servo_suppressed"] = after["suppressed"] - before["suppressed"]
+    summary["servo_deferred"] = after["deferred"] - before["deferred"]
+    return summary
 
 
 def play_audio(audio):
-    play(audio)
+    """Play audio on the shared output stream and block until it is heard."""
+    get_output().play(audio).wait()
 
 
-def speak_audio(audio: AudioSegment, max_angle: int = 60):
+def speak_audio(audio: AudioSegment, max_angle: int = 60, envelope=None, kind="reply"):
     """Play an AudioSegment while animating the mouth/arms to the audio.
 
-    This function starts playback in a background thread and synchronizes
-    servo animation based on the audio's RMS over small windows.
+    This function queues the clip on the shared output stream and
+    synchronizes servo animation based on the audio's RMS over small
+    windows. Pass a
+    precomputed envelope (e.g. from utils.envelope.envelope_for_file) to
+    skip analysing the clip. Returns the clip's lip-sync stats (see
+    animate_servo_with_audio).
 
     On environments without Raspberry Pi GPIO libraries, servo control
     becomes a no-op but audio still plays.
@@ -125,11 +212,17 @@ def speak_audio(audio: AudioSegment, max_angle: int = 60):
     # Ensure mono for consistent RMS behavior
     audio_mono = audio.set_channels(1)
 
-    t = threading.Thread(target=play_audio, args=(audio_mono,), daemon=True)
-    t.start()
-
-    animate_servo_with_audio(audio_mono, max_angle=max_angle)
-    t.join()
+    playback = get_output().play(audio_mono)
+
+    sync = animate_servo_with_audio(audio_mono, max_angle=max_angle,
+                                    envelope=envelope, playback=playback, kind=kind)
+    playback.wait()
+    if sync["frames"]:
+        print(f"Lip sync: mean {sync['mean_ms']:.0f} ms, p95 {sync['p95_ms']:.0f} ms, "
+              f"max {sync['max_ms']:.0f} ms, {sync['skipped']} frames skipped; "
+              f"servo writes {sync['servo_issued']} issued, "
+              f"{sync['servo_suppressed']} suppressed, {sync['servo_deferred']} deferred")
+    return sync
 
 
 if __name__ == "__main__":
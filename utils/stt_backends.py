@@ -0,0 +1,161 @@
+"""Swappable speech-to-text engines behind utils.transcribe.
+
+Every backend exposes the same small surface as a Whisper model:
+transcribe(audio, **options) returning a Whisper-style result dict
+({"text": ..., "segments": [{"words": [...]}]}), plus lazy, thread-safe
+load() with a warm-up pass. Pick one by name with get_backend().
+
+    whisper       openai-whisper as-is (fp16 on CUDA, fp32 on CPU)
+    whisper-int8  CPU Whisper with int8 dynamically-quantized Linear layers
+"""
+
+import platform
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import torch
+import whisper
+
+
+def default_device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def decode_options(beam_size: Optional[int] = None,
+                   temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+                   suppress_timestamps: bool = False,
+                   best_of: Optional[int] = None) -> dict:
+    """Whisper decoding options in the form transcribe() expects.
+
+    beam_size=None is greedy decoding. temperature is the fallback
+    schedule tried in order when a decode looks degenerate; pass a single
+    float to disable fallback. suppress_timestamps skips timestamp tokens,
+    which shortens decoding (word timestamps still come from alignment).
+    """
+    options = {"temperature": temperature, "without_timestamps": suppress_timestamps}
+    if beam_size is not None:
+        options["beam_size"] = beam_size
+    if best_of is not None:
+        options["best_of"] = best_of
+    return options
+
+
+class STTBackend:
+    """Base class: shared lazy loading, warm-up and option handling."""
+
+    name = "base"
+
+    def __init__(self, model: str = "medium", non_english: bool = False,
+                 device: Optional[str] = None, **options):
+        self.size = model
+        self.non_english = non_english
+        self.device = device or default_device()
+        self.model_name = model if (model == "large" or non_english) else model + ".en"
+        self.options = options
+        self.model = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def _load_model(self):
+        raise NotImplementedError
+
+    def _run(self, model, audio: np.ndarray, **options) -> dict:
+        raise NotImplementedError
+
+    def load(self):
+        with self._lock:
+            if self.model is None:
+                start = datetime.utcnow()
+                model = self._load_model()
+                # One throwaway pass so kernels/caches are initialized before
+                # the first real utterance
+                self._run(model, np.zeros(16000, dtype=np.float32))
+                self.model = model
+                secs = (datetime.utcnow() - start).total_seconds()
+                print(f"{self.name} {self.model_name} ready on {self.device} ({secs:.1f}s)")
+        return self.model
+
+    def transcribe(self, audio: np.ndarray, **options) -> dict:
+        model = self.load()
+        return self._run(model, audio, **{**self.options, **options})
+
+
+class WhisperBackend(STTBackend):
+    """openai-whisper, unmodified."""
+
+    name = "whisper"
+
+    def _load_model(self):
+        return whisper.load_model(self.model_name, device=self.device)
+
+    def _run(self, model, audio, **options):
+        options.setdefault("fp16", self.device == "cuda")
+        return model.transcribe(audio, **options)
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """CPU Whisper with int8 dynamic quantization of every Linear layer.
+
+    The attention and MLP projections dominate Whisper's CPU time; dynamic
+    quantization stores their weights as int8 and quantizes activations on
+    the fly, typically cutting latency and memory substantially for a small
+    accuracy cost. Convolutions and embeddings stay fp32.
+    """
+
+    name = "whisper-int8"
+
+    def __init__(self, model: str = "medium", non_english: bool = False,
+                 device: Optional[str] = None, **options):
+        # Dynamic quantized kernels are CPU-only
+        super().__init__(model, non_english, "cpu", **options)
+
+    def _load_model(self):
+        if platform.machine() in ("aarch64", "arm64", "armv7l") \
+                and "qnnpack" in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = "qnnpack"
+        model = whisper.load_model(self.model_name, device="cpu")
+        # whisper.model.Linear only overrides forward() to cast dtypes for
+        # fp16; quantize_dynamic needs the exact nn.Linear type to swap it
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+        return model
+
+    def _run(self, model, audio, **options):
+        options["fp16"] = False
+        with torch.inference_mode():
+            return model.transcribe(audio, **options)
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    QuantizedWhisperBackend.name: QuantizedWhisperBackend,
+}
+
+# (backend, size, english_only, device, options) -> shared instance
+_INSTANCES: Dict[Tuple, STTBackend] = {}
+_INSTANCES_LOCK = threading.Lock()
+
+
+def get_backend(name: str = "whisper", model: str = "medium",
+                non_english: bool = False, device: Optional[str] = None,
+                **options) -> STTBackend:
+    """Process-wide backend instance for this configuration."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STT backend {name!r}; choose from {sorted(BACKENDS)}")
+    cls = BACKENDS[name]
+    device = "cpu" if cls is QuantizedWhisperBackend else (device or default_device())
+    english_only = not (model == "large" or non_english)
+    key = (name, model, english_only, device, tuple(sorted((k, repr(v)) for k, v in options.items())))
+    with _INSTANCES_LOCK:
+        if key not in _INSTANCES:
+            _INSTANCES[key] = cls(model, non_english, device, **options)
+        return _INSTANCES[key]
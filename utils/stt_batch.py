@@ -0,0 +1,288 @@
+"""Batched Whisper inference for many concurrent audio streams.
+
+Whisper's encoder always processes a full 30 s window, padded with
+silence, so a short utterance costs nearly as much as a long one. On a
+CPU box with several microphones or robots, most of the time goes to
+those padded encoder passes, run one caller at a time.
+
+BatchedTranscriber puts a single worker thread in front of the model.
+Callers block in transcribe() as usual. The worker starts a batch once
+max_batch requests are waiting, or max_wait_ms after the oldest one
+arrived, whichever comes first. The batch is turned into one stacked
+log-mel tensor and runs through one encoder pass. Requests sharing
+language, task and initial_prompt are then decoded together. Each caller
+gets its own Whisper-style result back.
+
+Prompts are the catch. Whisper's decoder has no padding mask, so prompts
+of different lengths can't share a decoder pass. One-shot utterances (the
+fleet server, bench_batch.py) have no prompt and batch fully. Live
+streams through IncrementalTranscriber prompt each decode with that
+stream's committed text, so concurrent streams share the encoder pass but
+mostly decode one by one. stats() reports both: mean_batch per encoder
+pass and mean_decode_batch per decoder pass.
+
+Added latency is bounded. A request waits at most max_wait_ms for its
+batch to fill, plus any batch already running. max_batch caps how long a
+single batch can take.
+
+Results carry segment timestamps, taken from the timestamp tokens the
+decoder emits, but no word timings. Requests the batched path can't
+honour exactly run alone on the same worker, through the wrapped
+backend's transcribe():
+
+- Audio longer than one 30 s window.
+- word_timestamps. Whisper's alignment re-runs the whole model per clip,
+  which would undo the batching. Live transcription therefore batches
+  only with IncrementalTranscriber(word_timestamps=False), which commits
+  at segment boundaries instead of word boundaries.
+- Decodes that trip the temperature fallback, at their higher
+  temperatures.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES, SAMPLE_RATE, log_mel_spectrogram, pad_or_trim
+from whisper.tokenizer import get_tokenizer
+
+try:
+    from utils.stt_backends import STTBackend
+except ImportError:  # run as a script from inside utils/
+    from stt_backends import STTBackend
+
+# whisper.transcribe()'s defaults for deciding a decode needs a retry
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class _Request:
+    def __init__(self, audio: np.ndarray, options: dict):
+        self.audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        self.options = options
+        self.enqueued = time.monotonic()
+        self.started = None
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+    @property
+    def batchable(self) -> bool:
+        return self.audio.shape[0] <= N_SAMPLES and not self.options.get("word_timestamps")
+
+    def finish(self, result=None, error=None):
+        self.result, self.error = result, error
+        self.done.set()
+
+
+class BatchedTranscriber:
+    """Drop-in STT backend that batches transcribe() calls across threads.
+
+    backend is a Whisper-based STTBackend (see utils.stt_backends) that
+    provides the model and the unbatched fallback.
+    """
+
+    def __init__(self, backend: STTBackend, max_batch: int = 8, max_wait_ms: float = 30.0):
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = f"{backend.name}-batched"
+        self.model_name = backend.model_name
+        self.batches = 0
+        self.requests = 0
+        self.decodes = 0   # decoder passes
+        self.decoded = 0   # requests decoded in them
+        self.waits = deque(maxlen=1000)  # seconds from enqueue to batch start
+        self._pending: List[_Request] = []
+        self._cond = threading.Condition()
+        self._worker = None
+
+    @property
+    def ready(self) -> bool:
+        return self.backend.ready
+
+    def load(self):
+        model = self.backend.load()
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True,
+                                                name="stt-batch")
+                self._worker.start()
+        return model
+
+    def transcribe(self, audio: np.ndarray, **options) -> dict:
+        """Same contract as STTBackend.transcribe(); blocks until this clip is done."""
+        self.load()
+        request = _Request(audio, {**self.backend.options, **options})
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stats(self) -> dict:
+        waits = np.asarray(self.waits) * 1000
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "mean_decode_batch": self.decoded / self.decodes if self.decodes else 0.0,
+            "wait_p95_ms": float(np.percentile(waits, 95)) if waits.size else 0.0,
+        }
+
+    # --- worker ---
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # Wait for company, but never past the oldest request's deadline
+            deadline = self._pending[0].enqueued + self.max_wait
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            now = time.monotonic()
+            for request in batch:
+                request.started = now
+                self.waits.append(now - request.enqueued)
+            self.batches += 1
+            self.requests += len(batch)
+            batched = [r for r in batch if r.batchable]
+            try:
+                if batched:
+                    self._transcribe_batch(batched)
+            except Exception as e:
+                for request in batched:
+                    if not request.done.is_set():
+                        request.finish(error=e)
+            for request in batch:
+                if not request.done.is_set():
+                    self._transcribe_one(request)
+
+    def _transcribe_one(self, request: _Request):
+        try:
+            request.finish(self.backend.transcribe(request.audio, **request.options))
+        except Exception as e:
+            request.finish(error=e)
+
+    def _transcribe_batch(self, batch: List[_Request]):
+        model = self.backend.model
+        fp16 = bool(batch[0].options.get("fp16", self.backend.device == "cuda"))
+        mel = torch.stack([log_mel_spectrogram(pad_or_trim(r.audio), model.dims.n_mels)
+                           for r in batch]).to(model.device)
+        if fp16:
+            mel = mel.half()
+        with torch.inference_mode():
+            features = model.encoder(mel)
+            languages = self._languages(model, features, batch)
+
+            groups = {}
+            for i, request in enumerate(batch):
+                key = (languages[i], request.options.get("initial_prompt"),
+                       request.options.get("task", "transcribe"))
+                groups.setdefault(key, []).append(i)
+            for (language, prompt, task), indices in groups.items():
+                options = batch[indices[0]].options
+                tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                          language=language, task=task)
+                decode_options = whisper.DecodingOptions(
+                    task=task, language=language, temperature=0.0, fp16=fp16,
+                    prompt=prompt, beam_size=options.get("beam_size"),
+                    without_timestamps=bool(options.get("without_timestamps", False)),
+                    suppress_tokens=options.get("suppress_tokens", "-1"))
+                results = whisper.decode(model, features[indices], decode_options)
+                self.decodes += 1
+                self.decoded += len(indices)
+                for i, result in zip(indices, results):
+                    request = batch[i]
+                    if _needs_fallback(result, request.options):
+                        continue  # retried alone by _run
+                    request.finish(_to_result(result, request, language, tokenizer))
+
+    def _languages(self, model, features, batch: List[_Request]) -> List[str]:
+        if not model.is_multilingual:
+            return ["en"] * len(batch)
+        languages = [r.options.get("language") for r in batch]
+        unknown = [i for i, lang in enumerate(languages) if lang is None]
+        if unknown:
+            _, probs = whisper.detect_language(model, features[unknown])
+            for i, p in zip(unknown, probs):
+                languages[i] = max(p, key=p.get)
+        return languages
+
+
+def _needs_fallback(result, options: dict) -> bool:
+    """Whether whisper.transcribe() would retry this decode at a higher temperature."""
+    temperature = options.get("temperature", 0.0)
+    if isinstance(temperature, (int, float)) or len(temperature) < 2:
+        return False
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False  # silence
+    return (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < LOGPROB_THRESHOLD)
+
+
+def _segments(tokens: List[int], tokenizer, duration: float):
+    """[(start, end, tokens)] split where the decoder emitted two timestamps in a row.
+
+    Same rule as whisper.transcribe(). A trailing segment the decoder
+    didn't close ends at the end of the audio.
+    """
+    begin = tokenizer.timestamp_begin
+    cuts = [i for i in range(1, len(tokens))
+            if tokens[i - 1] >= begin and tokens[i] >= begin]
+    pieces = [tokens[a:b] for a, b in zip([0] + cuts, cuts + [len(tokens)])]
+    segments = []
+    for piece in pieces:
+        stamps = [t for t in piece if t >= begin]
+        if not any(t < tokenizer.eot for t in piece):
+            continue
+        start = (stamps[0] - begin) * 0.02 if stamps and piece[0] >= begin else 0.0
+        end = (piece[-1] - begin) * 0.02 if len(stamps) > 1 and piece[-1] >= begin else duration
+        segments.append((start, min(end, duration), piece))
+    return segments
+
+
+def _to_result(result, request: _Request, language: str, tokenizer) -> dict:
+    """A whisper.transcribe()-shaped dict for one decoded window."""
+    silent = result.no_speech_prob > NO_SPEECH_THRESHOLD \
+        and result.avg_logprob <= LOGPROB_THRESHOLD
+    text = "" if silent else result.text
+    duration = request.audio.shape[0] / SAMPLE_RATE
+    segments = [] if silent else [{
+        "id": i, "seek": 0, "start": start, "end": end,
+        "text": tokenizer.decode(tokens), "tokens": tokens, "temperature": 0.0,
+        "avg_logprob": result.avg_logprob,
+        "compression_ratio": result.compression_ratio,
+        "no_speech_prob": result.no_speech_prob,
+    } for i, (start, end, tokens) in enumerate(_segments(result.tokens, tokenizer, duration))]
+    return {"text": text, "segments": segments, "language": language}
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_batched(backend: STTBackend, max_batch: int = 8,
+                max_wait_ms: float = 30.0) -> BatchedTranscriber:
+    """Process-wide batching engine for backend (one worker per model)."""
+    with _engines_lock:
+        if id(backend) not in _engines:
+            _engines[id(backend)] = BatchedTranscriber(backend, max_batch, max_wait_ms)
+        return _engines[id(backend)]
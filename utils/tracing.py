@@ -0,0 +1,254 @@
+"""Per-turn latency tracing: one JSONL record per stage span or event.
+
+Every record carries the turn it belongs to, its start time ("t", seconds
+since the tracer started) and, for spans, the duration in ms:
+
+    {"turn": 3, "stage": "download", "t": 41.207, "ms": 182.4, "bytes": 48213}
+
+The turn id lives in a context variable. asyncio tasks inherit it, and so
+do threads started with run_in_context(), which the orchestrator uses for
+its blocking stages. Work on other threads falls back to the most recently
+started turn. Writing a record is one json.dumps plus a buffered write,
+so tracing stays on by default. Set OBAMA_TRACE=0 to disable it, or set it
+to a file path to choose the output.
+
+    python utils/tracing.py summary .traces/*.jsonl   # p50/p95/p99 per stage
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+TRACE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), ".traces")
+
+# Events reported by their last occurrence in a turn rather than the first
+LAST_EVENTS = {"servo_done"}
+
+_turn: contextvars.ContextVar = contextvars.ContextVar("trace_turn", default=None)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer: "Tracer", stage: str, attrs: dict):
+        self.tracer = tracer
+        self.stage = stage
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes known only once the span is running."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.write(self.stage, self.start, (time.monotonic() - self.start) * 1000,
+                          self.attrs)
+        return False
+
+
+class Tracer:
+    """Buffered JSONL writer; flushed at the end of every turn."""
+
+    def __init__(self, path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.t0 = time.monotonic()
+        self.last_turn = 0
+        self._lock = threading.Lock()
+        self._file = None
+        if enabled:
+            if path is None:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                path = os.path.join(TRACE_DIR, time.strftime("session-%Y%m%d-%H%M%S.jsonl"))
+            self.path = path
+            self._file = open(path, "a", buffering=1 << 16)
+
+    def begin_turn(self) -> int:
+        """Start a new turn id and make it current in this context."""
+        with self._lock:
+            self.last_turn += 1
+            turn = self.last_turn
+        _turn.set(turn)
+        return turn
+
+    def span(self, stage: str, **attrs):
+        return _Span(self, stage, attrs) if self.enabled else _NULL_SPAN
+
+    def event(self, stage: str, **attrs):
+        if self.enabled:
+            self.write(stage, time.monotonic(), None, attrs)
+
+    def write(self, stage: str, start: float, ms: Optional[float], attrs: dict):
+        record = {"turn": _turn.get() or self.last_turn, "stage": stage,
+                  "t": round(start - self.t0, 4)}
+        if ms is not None:
+            record["ms"] = round(ms, 2)
+        record.update(attrs)
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from OBAMA_TRACE."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            setting = os.getenv("OBAMA_TRACE", "").strip()
+            if setting.lower() in {"0", "off", "false", "no"}:
+                _tracer = Tracer(enabled=False)
+            else:
+                _tracer = Tracer(path=setting or None)
+    return _tracer
+
+
+def span(stage: str, **attrs):
+    return get_tracer().span(stage, **attrs)
+
+
+def event(stage: str, **attrs):
+    get_tracer().event(stage, **attrs)
+
+
+def begin_turn() -> int:
+    return get_tracer().begin_turn()
+
+
+def run_in_context(target, *args) -> threading.Thread:
+    """Start a daemon thread running target(*args) in a copy of this context."""
+    ctx = contextvars.copy_context()
+    thread = threading.Thread(target=ctx.run, args=(target,) + args, daemon=True)
+    thread.start()
+    return thread
+
+
+# --- summary ---
+
+def load(paths: Iterable[str]) -> List[dict]:
+    records = []
+    for n, path in enumerate(paths):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of a live session
+                record["turn"] = (n, record.get("turn"))
+                records.append(record)
+    return records
+
+
+def summarize(records: List[dict]) -> Dict[str, dict]:
+    """Per stage: span durations, or for events the offset from capture end.
+
+    Event offsets are measured from the turn's capture_end (or its first
+    record when there is none, e.g. typed input). Events tagged with a
+    kind are reported per kind, e.g. "audio_start:reply" and
+    "audio_start:filler".
+    """
+    turns: Dict[tuple, List[dict]] = {}
+    for record in records:
+        turns.setdefault(record["turn"], []).append(record)
+
+    samples: Dict[str, List[float]] = {}
+    kinds: Dict[str, str] = {}
+    for recs in turns.values():
+        ends = [r["t"] for r in recs if r["stage"] == "capture_end"]
+        t0 = ends[0] if ends else min(r["t"] for r in recs)
+        firsts: Dict[str, float] = {}
+        for r in recs:
+            if "ms" in r:
+                samples.setdefault(r["stage"], []).append(r["ms"])
+                kinds[r["stage"]] = "span"
+                continue
+            at = (r["t"] - t0) * 1000
+            stage = r["stage"]
+            last = stage in LAST_EVENTS
+            if r.get("kind"):
+                stage = f"{stage}:{r['kind']}"
+            if stage not in firsts or (last and at > firsts[stage]):
+                firsts[stage] = at
+        for stage, at in firsts.items():
+            samples.setdefault(stage, []).append(at)
+            kinds[stage] = "event"
+
+    summary = {}
+    for stage, values in samples.items():
+        values = sorted(values)
+        summary[stage] = {
+            "kind": kinds[stage],
+            "n": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+        }
+    return summary
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def print_summary(summary: Dict[str, dict]):
+    print(f"{'stage':<20} {'kind':<6} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, s in sorted(summary.items(), key=lambda kv: (kv[1]["kind"], kv[1]["p50"])):
+        print(f"{stage:<20} {s['kind']:<6} {s['n']:>5} {s['p50']:>9.1f} "
+              f"{s['p95']:>9.1f} {s['p99']:>9.1f}")
+    print("span = stage duration; event = time since the end of capture")
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary_cmd = sub.add_parser("summary", help="p50/p95/p99 per stage")
+    summary_cmd.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(TRACE_DIR, "*.jsonl")))
+    if not files:
+        parser.error(f"no trace files given and none in {TRACE_DIR}")
+    print_summary(summarize(load(files)))
@@ -2,122 +2,367 @@
 
 import argparse
 import os
+import sys
+import select
 import numpy as np
-import whisper
-import torch
-import sounddevice as sd
 
-from datetime import datetime, timedelta
 from queue import Queue
 from time import sleep
 from typing import Optional, List
 import threading
 
+try:
+    from utils.ringbuffer import AudioRingBuffer
+    from utils.stt_backends import BACKENDS, STTBackend, get_backend
+    from utils.tracing import event, span
+    from utils.vad import EnergyVAD
+except ImportError:  # run as a script from inside utils/
+    from ringbuffer import AudioRingBuffer
+    from stt_backends import BACKENDS, STTBackend, get_backend
+    from tracing import event, span
+    from vad import EnergyVAD
+
+
+def get_transcriber(model: str = "medium", non_english: bool = False,
+                    device: Optional[str] = None, backend: Optional[str] = None,
+                    **options) -> STTBackend:
+    """Process-wide STT backend for this model configuration.
+
+    backend defaults to $OBAMA_STT_BACKEND or "whisper"; options are
+    decoding options (see stt_backends.decode_options).
+    """
+    backend = backend or os.getenv("OBAMA_STT_BACKEND", "").strip() or "whisper"
+    return get_backend(backend, model, non_english, device, **options)
+
+
+def preload_transcriber(model: str = "medium", non_english: bool = False,
+                        device: Optional[str] = None, backend: Optional[str] = None,
+                        **options) -> STTBackend:
+    """Start loading and warming up the model in a background thread."""
+    transcriber = get_transcriber(model, non_english, device, backend, **options)
+    if not transcriber.ready:
+        threading.Thread(target=transcriber.load, daemon=True,
+                         name="stt-preload").start()
+    return transcriber
+
+
+def _norm_word(word: str) -> str:
+    return "".join(c for c in word.lower() if c.isalnum() or c == "'")
+
+
+class IncrementalTranscriber:
+    """Streaming decode that only re-transcribes the uncommitted tail.
+
+    Audio is written into `ring` as it arrives (directly from the capture
+    callback, or via feed()). Each update() decodes the audio after the
+    committed point (with the committed text as prompt) and commits the
+    words on which the last `agreement` hypotheses agree, then moves the
+    committed point past the audio they cover. Compute per tick therefore
+    scales with the uncommitted tail, not the utterance, and nothing falls
+    off the end of the final text.
+
+    If the tail grows past max_tail_sec without agreement, words ending
+    more than a second before the end of the tail are committed anyway.
+    If it reaches 2 * max_tail_sec with still nothing committed (no word
+    timings, or a hypothesis that never settles), the whole current
+    hypothesis is committed: the ring holds only 5 s more, and audio that
+    wraps out of it before being committed would be lost from the text.
+
+    With word_timestamps=False the commit point can only move to the end
+    of a finished segment: the agreed words are committed up to the last
+    segment boundary among them. That's coarser, but it skips Whisper's
+    per-clip alignment pass, which utils.stt_batch.BatchedTranscriber
+    can't batch. Concurrent streams then share its encoder passes. Each
+    decode is prompted with its own stream's committed text, so decodes
+    rarely batch.
+    """
+
+    def __init__(self, transcriber: STTBackend, sample_rate: int = 16000,
+                 agreement: int = 2, max_tail_sec: float = 5.0,
+                 word_timestamps: bool = True):
+        self.transcriber = transcriber
+        self.word_timestamps = word_timestamps
+        self.sample_rate = sample_rate
+        self.agreement = max(2, agreement)
+        self.max_tail = int(max_tail_sec * sample_rate)
+        # Room for a full tail plus capture that happens while decoding it
+        self.ring = AudioRingBuffer(int((2 * max_tail_sec + 5) * sample_rate))
+        self.committed: List[str] = []
+        self.tentative: List[str] = []
+        self._start = 0           # absolute position of the uncommitted tail
+        self._decoded_upto = 0
+        self._history: List[List[str]] = []
+
+    def feed(self, samples: np.ndarray):
+        self.ring.write(samples)
+
+    @property
+    def decoded_upto(self) -> int:
+        """Absolute ring position covered by the last decode."""
+        return self._decoded_upto
+
+    def skip_to(self, position: int):
+        """Drop uncommitted audio before `position` (e.g. leading silence)."""
+        if position > self._start:
+            self._start = position
+            self._decoded_upto = max(self._decoded_upto, position)
+            self._history = []
+
+    @property
+    def text(self) -> str:
+        """Committed + tentative text for live display."""
+        return " ".join(self.committed + self.tentative).strip()
+
+    def _decode(self, tail: np.ndarray):
+        """Decode the tail; returns [(word, end_sec or None)] relative to the tail."""
+        prompt = " ".join(self.committed)[-200:] or None
+        result = self.transcriber.transcribe(
+            tail, word_timestamps=self.word_timestamps, initial_prompt=prompt,
+            condition_on_previous_text=False,
+        )
+        segments = result.get("segments", [])
+        words = []
+        for i, seg in enumerate(segments):
+            if seg.get("words"):
+                words += [(w["word"].strip(), float(w["end"])) for w in seg["words"]
+                          if w.get("word", "").strip()]
+                continue
+            # No word timings: only a finished segment's end can anchor a
+            # commit (the last one may still be mid-phrase)
+            seg_words = seg.get("text", "").split()
+            end = float(seg["end"]) if i < len(segments) - 1 else None
+            words += [(w, end if j == len(seg_words) - 1 else None)
+                      for j, w in enumerate(seg_words)]
+        if not words and result.get("text", "").strip():
+            # No segments either: can't place a commit point
+            words = [(w, None) for w in result["text"].split()]
+        return words
+
+    def _drop_overlap(self, words):
+        """Drop leading words that repeat the end of the committed text.
+
+        Word boundaries are fuzzy, so the start of the tail can re-decode
+        the last committed word or two.
+        """
+        tail = [_norm_word(w) for w in self.committed[-5:]]
+        head = [_norm_word(w) for w, _ in words]
+        for n in range(min(len(tail), len(head)), 0, -1):
+            if tail[-n:] == head[:n]:
+                return words[n:]
+        return words
+
+    def _commit(self, words, count: int, tail_size: int) -> int:
+        """Commit up to `count` words; returns how many were committed.
+
+        Stops at the last of them with a known end time, since that is
+        where the committed point moves to.
+        """
+        while count > 0 and words[count - 1][1] is None:
+            count -= 1
+        if count <= 0:
+            return 0
+        end = words[count - 1][1]
+        self.committed.extend(w for w, _ in words[:count])
+        self._start += min(tail_size, int(end * self.sample_rate))
+        self._history = [h[count:] for h in self._history]
+        return count
+
+    def _clamp_start(self):
+        """Move the committed point up to the oldest audio the ring still holds."""
+        if self._start < self.ring.oldest:
+            print(f"Transcriber: {(self.ring.oldest - self._start) / self.sample_rate:.1f}s "
+                  f"of uncommitted audio was overwritten before it could be committed")
+            self._start = self.ring.oldest
+
+    def update(self) -> str:
+        """Decode any new audio and advance the committed prefix."""
+        written = self.ring.written
+        self._clamp_start()
+        if written == self._decoded_upto or written - self._start < self.sample_rate // 4:
+            return self.text
+        tail = self.ring.since(self._start)
+        self._decoded_upto = self._start + tail.size
+        words = self._drop_overlap(self._decode(tail))
+        hyp = [_norm_word(w) for w, _ in words]
+        self._history = (self._history + [hyp])[-self.agreement:]
+
+        agreed = 0
+        if len(self._history) == self.agreement:
+            for column in zip(*self._history):
+                if any(c != column[0] for c in column):
+                    break
+                agreed += 1
+        if agreed == 0 and tail.size > self.max_tail:
+            limit = tail.size / self.sample_rate - 1.0
+            agreed = sum(1 for _, end in words if end is not None and end <= limit)
+        agreed = self._commit(words, agreed, tail.size)
+        if self._decoded_upto - self._start >= 2 * self.max_tail:
+            # No commit point for this long; take the hypothesis before
+            # the ring wraps past the audio it came from
+            print(f"Transcriber: no commit point in "
+                  f"{(self._decoded_upto - self._start) / self.sample_rate:.1f}s; "
+                  f"committing the current hypothesis")
+            self.committed.extend(w for w, _ in words[agreed:])
+            self._start = self._decoded_upto
+            self._history = []
+            agreed = len(words)
+        self.tentative = [w for w, _ in words[agreed:]]
+        return self.text
+
+    def finish(self) -> str:
+        """Decode whatever is left and return the full utterance."""
+        self._clamp_start()
+        tail = self.ring.since(self._start)
+        if tail.size >= self.sample_rate // 10:
+            words = self._drop_overlap(self._decode(tail))
+            self.committed.extend(w for w, _ in words)
+        self._start = self._decoded_upto = self.ring.written
+        self.tentative = []
+        self._history = []
+        return " ".join(self.committed).strip()
+
+
+def _enter_pressed(timeout: float) -> bool:
+    """Wait up to timeout for a line on stdin (consuming it) without a thread.
+
+    A blocked input() thread would outlive an auto-stopped turn and swallow
+    the user's next Enter, so poll stdin where the platform allows it.
+    """
+    readable, _, _ = select.select([sys.stdin], [], [], timeout)
+    if readable:
+        sys.stdin.readline()
+        return True
+    return False
+
 
 def stream_transcribe_until_enter(
     model: str = "medium",
     non_english: bool = False,
-    energy_threshold: int = 1000,  # Ignored in sounddevice path (kept for API compat)
+    energy_threshold: int = 1000,  # VAD threshold, SpeechRecognition energy scale
     record_timeout: float = 0.5,   # seconds per chunk
-    phrase_timeout: float = 1.2,   # seconds of silence to segment
+    phrase_timeout: float = 1.2,   # seconds of trailing silence that ends the turn
     default_microphone: Optional[str] = None,  # Ignored; use OS default
     sample_rate: int = 16000,
-    window_sec: float = 5.0,
+    window_sec: float = 5.0,       # max uncommitted audio re-decoded per tick
+    auto_stop: bool = True,
+    use_vad: bool = True,
+    stop_on_enter: bool = True,
+    backend: Optional[str] = None,  # see utils.stt_backends.BACKENDS
+    live_input=None,  # an open capture to continue, see BargeInDetector.attach
 ) -> str:
-    """Real-time mic transcription using Whisper + sounddevice; stops on Enter.
+    """Real-time mic transcription using Whisper + sounddevice.
+
+    Captures audio in short blocks and decodes it incrementally (see
+    IncrementalTranscriber) for low perceived latency. An energy VAD
+    (see EnergyVAD) runs on the capture stream: Whisper is only invoked
+    when new speech has been heard, and with auto_stop the turn ends after
+    phrase_timeout seconds of trailing silence. Pressing Enter also ends it
+    unless stop_on_enter is False (hands-free). Returns the full transcribed
+    utterance. The STT model is shared across calls (see get_transcriber).
 
-    Captures audio in short blocks, transcribes a rolling window for faster
-    perceived latency. Returns the final transcribed text when Enter is pressed.
+    live_input continues an already-open microphone instead of opening one,
+    e.g. the barge-in detector's after the user interrupted: everything it
+    captured since just before the trigger becomes the start of the
+    utterance, with no gap. It is stopped when the capture ends.
     """
-    # Load whisper model
-    use_model = model if (model == "large" or non_english) else model + ".en"
-    audio_model = whisper.load_model(use_model)
+    audio_model = get_transcriber(model, non_english, backend=backend)
+
+    engine = IncrementalTranscriber(audio_model, sample_rate=sample_rate,
+                                    max_tail_sec=window_sec)
+    vad = EnergyVAD(sample_rate=sample_rate, energy_threshold=energy_threshold,
+                    hangover_sec=phrase_timeout) if use_vad else None
+    # Audio kept ahead of the detected speech onset so the first word isn't clipped
+    preroll = int(0.3 * sample_rate)
 
-    # Rolling audio buffer
-    buffer: List[np.ndarray] = []
-    buffer_lock = threading.Lock()
     stop_event = threading.Event()
-    last_audio_time = None
 
     def audio_callback(indata, frames, time_info, status):
-        nonlocal last_audio_time
         if status:
             # Non-fatal under/overflows; can log if desired
             pass
-        with buffer_lock:
-            buffer.append(indata.copy().reshape(-1))
-        last_audio_time = datetime.utcnow()
-
-    # Start input stream
-    stream = sd.InputStream(
-        samplerate=sample_rate,
-        channels=1,
-        dtype='float32',
-        callback=audio_callback,
-        blocksize=int(record_timeout * sample_rate),
-    )
-    stream.start()
+        # Straight into the preallocated ring; no per-block allocation
+        engine.ring.write(indata[:, 0])
+        if vad is not None:
+            vad.process(indata[:, 0])
 
-    def _wait_for_enter():
-        try:
-            input("")
-        except Exception:
-            pass
-        stop_event.set()
+    if live_input is not None:
+        live_input.attach(lambda samples: audio_callback(samples[:, None], len(samples), None, None))
+        stream = live_input
+    else:
+        # Start input stream (imported here so headless callers don't need PortAudio)
+        import sounddevice as sd
 
-    print("(Press Enter to stop)")
-    threading.Thread(target=_wait_for_enter, daemon=True).start()
+        stream = sd.InputStream(
+            samplerate=sample_rate,
+            channels=1,
+            dtype='float32',
+            callback=audio_callback,
+            blocksize=int(record_timeout * sample_rate),
+        )
+        stream.start()
 
-    transcription = ['']
-    last_text = ''
+    poll_stdin = stop_on_enter and os.name != 'nt'
+    if stop_on_enter and not poll_stdin:
+        def _wait_for_enter():
+            try:
+                input("")
+            except Exception:
+                pass
+            stop_event.set()
 
-    print("Model loaded. Speak now...\n")
+        threading.Thread(target=_wait_for_enter, daemon=True).start()
+
+    if stop_on_enter:
+        print("(Press Enter to stop" + (", or just stop talking)" if auto_stop and vad else ")"))
+
+    shown = ''
+
+    print("Model loaded. Speak now...\n" if audio_model.ready
+          else "Speak now... (model still warming up)\n")
 
     try:
         while not stop_event.is_set():
-            # Gather current audio buffer
-            with buffer_lock:
-                if not buffer:
-                    pass
-                else:
-                    audio = np.concatenate(buffer)
-                    # Limit to last window_sec seconds
-                    max_samples = int(window_sec * sample_rate)
-                    if audio.shape[0] > max_samples:
-                        audio = audio[-max_samples:]
-
-                    # Segmenting on silence: if too much time passed since last audio chunk
-                    phrase_complete = False
-                    if last_audio_time is not None and (datetime.utcnow() - last_audio_time) > timedelta(seconds=phrase_timeout):
-                        phrase_complete = True
-
-            if buffer:
-                # Transcribe current rolling window
+            if vad is None:
+                should_decode = True
+            elif not vad.triggered:
+                # Nothing said yet: don't spend inference on silence
+                engine.skip_to(engine.ring.written - preroll)
+                should_decode = False
+            else:
+                should_decode = vad.speech_since(engine.decoded_upto)
+
+            if should_decode:
                 try:
-                    result = audio_model.transcribe(audio, fp16=torch.cuda.is_available())
-                    text = result.get('text', '').strip()
+                    text = engine.update()
                 except Exception:
-                    text = last_text
-                if text:
-                    last_text = text
-                    if phrase_complete:
-                        transcription.append(text)
-                    else:
-                        transcription[-1] = text
-
-                # Live update
-                os.system('cls' if os.name == 'nt' else 'clear')
-                for line in transcription:
-                    print(line)
-                print('', end='', flush=True)
-
-            sleep(0.1)
+                    text = shown
+                if text != shown:
+                    shown = text
+                    # Live update
+                    os.system('cls' if os.name == 'nt' else 'clear')
+                    print(text)
+                    print('', end='', flush=True)
+
+            if auto_stop and vad is not None and vad.ended:
+                break
+            if poll_stdin:
+                if _enter_pressed(0.1):
+                    break
+            else:
+                sleep(0.1)
     finally:
         stream.stop()
-        stream.close()
+        if live_input is None:
+            stream.close()
 
+    event("capture_end")
     sleep(0.2)
-    return last_text.strip()
+    if vad is not None and not vad.triggered:
+        return ''
+    with span("transcript") as sp:
+        text = engine.finish()
+        sp.set(chars=len(text))
+    return text
 
 
 def main():
@@ -125,7 +370,10 @@ def main():
     parser.add_argument("--model", default="medium", choices=["tiny", "base", "small", "medium", "large"], help="Whisper model")
     parser.add_argument("--non_english", action='store_true', help="Use multi-lingual model (not .en)")
     parser.add_argument("--record_timeout", default=0.5, type=float, help="Block duration in seconds")
-    parser.add_argument("--phrase_timeout", default=1.2, type=float, help="Silence gap to segment in seconds")
+    parser.add_argument("--phrase_timeout", default=1.2, type=float, help="Trailing silence that ends the utterance, in seconds")
+    parser.add_argument("--energy_threshold", default=1000, type=float, help="VAD energy threshold (16-bit RMS)")
+    parser.add_argument("--no_auto_stop", action='store_true', help="Only stop on Enter")
+    parser.add_argument("--backend", default=None, choices=sorted(BACKENDS), help="STT engine (default: $OBAMA_STT_BACKEND or whisper)")
     args = parser.parse_args()
 
     # Run the streaming transcriber and print the final text
@@ -134,6 +382,9 @@ def main():
         non_english=args.non_english,
         record_timeout=args.record_timeout,
         phrase_timeout=args.phrase_timeout,
+        energy_threshold=args.energy_threshold,
+        auto_stop=not args.no_auto_stop,
+        backend=args.backend,
     )
     print("\n\nFinal:")
     print(text)
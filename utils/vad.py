@@ -0,0 +1,86 @@
+"""Energy-based voice activity detection for the capture stream."""
+
+import numpy as np
+
+
+class EnergyVAD:
+    """Frame-energy VAD with start debounce and trailing-silence hangover.
+
+    energy_threshold uses the same scale as SpeechRecognition's
+    Recognizer.energy_threshold (RMS of 16-bit samples), so the existing
+    `energy_threshold=1000` setting keeps its meaning. With dynamic=True the
+    threshold tracks the ambient noise floor while nobody is talking.
+
+    process() is cheap (one vectorized pass per block) and is meant to be
+    called from the audio callback. Positions are absolute sample counts,
+    matching AudioRingBuffer.written.
+    """
+
+    def __init__(self, sample_rate: int = 16000, energy_threshold: float = 1000,
+                 frame_ms: float = 30, start_ms: float = 90,
+                 hangover_sec: float = 1.2, dynamic: bool = True,
+                 noise_ratio: float = 1.5, adjust_rate: float = 0.05):
+        self.sample_rate = sample_rate
+        self.energy_threshold = float(energy_threshold)
+        self.min_threshold = float(energy_threshold)
+        self.frame = max(1, int(sample_rate * frame_ms / 1000))
+        self.start_frames = max(1, int(round(start_ms / frame_ms)))
+        self.hangover = int(hangover_sec * sample_rate)
+        self.dynamic = dynamic
+        self.noise_ratio = noise_ratio
+        self.adjust_rate = adjust_rate
+        self.reset()
+
+    def reset(self):
+        self.position = 0            # samples processed so far
+        self.in_speech = False
+        self.speech_start = None     # absolute position speech first began
+        self.last_speech = None      # absolute position of the last voiced frame
+        self._voiced_run = 0
+        self._carry = np.zeros(0, dtype=np.float32)
+
+    @property
+    def triggered(self) -> bool:
+        """Whether any speech has been heard since reset()."""
+        return self.speech_start is not None
+
+    @property
+    def ended(self) -> bool:
+        """Speech was heard and has been followed by hangover_sec of silence."""
+        return (self.last_speech is not None and not self.in_speech
+                and self.position - self.last_speech >= self.hangover)
+
+    def speech_since(self, position: int) -> bool:
+        """Whether anything voiced was heard at or after `position`."""
+        return self.in_speech or (self.last_speech is not None
+                                  and self.last_speech >= position)
+
+    def process(self, samples: np.ndarray):
+        samples = np.concatenate([self._carry, np.asarray(samples, dtype=np.float32).reshape(-1)])
+        n_frames = samples.shape[0] // self.frame
+        used = n_frames * self.frame
+        self._carry = samples[used:]
+        if n_frames == 0:
+            return
+        frames = samples[:used].reshape(n_frames, self.frame) * 32768.0
+        energies = np.sqrt(np.mean(frames * frames, axis=1))
+
+        base = self.position
+        for i, energy in enumerate(energies):
+            frame_end = base + (i + 1) * self.frame
+            if energy > self.energy_threshold:
+                self._voiced_run += 1
+                if self._voiced_run >= self.start_frames:
+                    if not self.in_speech and self.speech_start is None:
+                        self.speech_start = frame_end - self._voiced_run * self.frame
+                    self.in_speech = True
+                if self.in_speech:
+                    self.last_speech = frame_end
+            else:
+                self._voiced_run = 0
+                self.in_speech = False
+                if self.dynamic and self.last_speech is None:
+                    # Track the room's noise floor until someone talks
+                    target = max(self.min_threshold, energy * self.noise_ratio)
+                    self.energy_threshold += (target - self.energy_threshold) * self.adjust_rate
+        self.position = base + used